@@ -9,18 +9,32 @@ Replaces the previous ``docker exec`` + ``opencode run`` approach with
 direct HTTP calls to the OpenCode server (port 4096 by default).
 """
 
-import argparse
 import json
 import os
 import signal
 import sys
 import time
-from datetime import datetime, timezone
-from typing import Dict, List, Optional
-from uuid import uuid4
+from typing import TYPE_CHECKING, Dict, List, Optional
 
 import requests
 
+if TYPE_CHECKING:
+    import argparse
+
+# Add path to import shared modules
+_shared_paths = [
+    "/opt",  # Inside Docker container (shared is at /opt/shared/)
+    os.path.join(os.path.dirname(__file__), ".."),  # Local development
+]
+for path in _shared_paths:
+    if os.path.exists(path) and path not in sys.path:
+        sys.path.insert(0, path)
+
+try:
+    from shared.timeline import append_timeline_entry, resolve_run_id as _resolve_run_id
+except ImportError:
+    raise ImportError("shared.timeline module is required")
+
 
 # ---------------------------------------------------------------------------
 # Configuration
@@ -39,7 +53,13 @@ _active_session_id: Optional[str] = None
 # Signal handling
 # ---------------------------------------------------------------------------
 def _signal_handler(signum, frame):
-    """Abort the running session (if any) and exit."""
+    """Abort the running session (if any) and exit.
+
+    Further SIGTERM/SIGINT are ignored first so a second signal cannot
+    re-enter the handler halfway through the abort request.
+    """
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
     if _active_host and _active_session_id:
         abort_session(_active_host, _active_session_id)
     sys.exit(1)
@@ -262,37 +282,17 @@ def get_trident_base() -> str:
 
 
 def resolve_run_id() -> str:
-    run_id = os.environ.get("RUN_ID", "").strip()
-    if run_id:
-        return run_id
-    base_dir = get_trident_base()
-    current_run = os.path.join(base_dir, "outputs", ".current_run")
-    try:
-        with open(current_run, "r", encoding="utf-8") as fh:
-            return fh.read().strip()
-    except FileNotFoundError:
-        return "manual"
-
-
-def write_timeline_entry(path: str, level: str, message: str,
-                         data: Optional[dict] = None) -> None:
-    entry = {
-        "ts": datetime.now(timezone.utc).isoformat(),
-        "level": level.upper(),
-        "msg": message,
-    }
-    if data:
-        entry["data"] = data
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "a", encoding="utf-8") as fh:
-        fh.write(json.dumps(entry, separators=(",", ":")) + "\n")
-        fh.flush()
+    return _resolve_run_id(get_trident_base())
 
 
 # ---------------------------------------------------------------------------
 # Argument parsing
 # ---------------------------------------------------------------------------
-def parse_args() -> argparse.Namespace:
+def parse_args() -> "argparse.Namespace":
+    # Imported lazily: this script is a short-lived helper and argparse is
+    # only needed once, at startup.
+    import argparse
+
     parser = argparse.ArgumentParser(
         description="Run db_admin benign agent via OpenCode Server API.",
     )
@@ -338,7 +338,8 @@ def main() -> int:
     timeout = args.timeout
     OPENCODE_SERVER_PORT = args.port
 
-    execution_id = uuid4().hex
+    execution_id = os.urandom(16).hex()
+    exec8 = execution_id[:8]
     run_id = resolve_run_id()
     base_dir = get_trident_base()
     output_dir = os.path.join(base_dir, "outputs", run_id, "benign_agent")
@@ -350,14 +351,14 @@ def main() -> int:
     print(f"[db_admin] Agent : {agent}")
     print(f"[db_admin] Goal  : {goal_text!r}")
 
-    write_timeline_entry(timeline_path, "INIT",
-                         "db_admin execution started", data={
-                             "goal": goal_text,
-                             "host": host,
-                             "agent": agent,
-                             "exec": execution_id[:8],
-                             "mode": "opencode_server_api",
-                         })
+    append_timeline_entry(timeline_path, "INIT",
+                          "db_admin execution started", data={
+                              "goal": goal_text,
+                              "host": host,
+                              "agent": agent,
+                              "exec": exec8,
+                              "mode": "opencode_server_api",
+                          })
 
     # ── 1. Wait for OpenCode server ──────────────────────────────────
     print("[db_admin] Waiting for OpenCode server...")
@@ -365,28 +366,28 @@ def main() -> int:
         msg = (f"OpenCode server not available at "
                f"{host}:{OPENCODE_SERVER_PORT}")
         print(f"[db_admin] ERROR: {msg}", file=sys.stderr)
-        write_timeline_entry(timeline_path, "ERROR", msg,
-                             data={"exec": execution_id[:8]})
+        append_timeline_entry(timeline_path, "ERROR", msg,
+                              data={"exec": exec8})
         return 1
     print("[db_admin] ✓ OpenCode server healthy")
 
     # ── 2. Create session ────────────────────────────────────────────
     session_id = create_session(host,
-                                title=f"db_admin {execution_id[:8]}")
+                                title=f"db_admin {exec8}")
     if not session_id:
         msg = "Failed to create OpenCode session"
         print(f"[db_admin] ERROR: {msg}", file=sys.stderr)
-        write_timeline_entry(timeline_path, "ERROR", msg,
-                             data={"exec": execution_id[:8]})
+        append_timeline_entry(timeline_path, "ERROR", msg,
+                              data={"exec": exec8})
         return 1
 
     _active_host = host
     _active_session_id = session_id
 
     print(f"[db_admin] ✓ Session created: {session_id[:8]}")
-    write_timeline_entry(timeline_path, "SESSION", "Session created",
-                         data={"session_id": session_id,
-                               "exec": execution_id[:8]})
+    append_timeline_entry(timeline_path, "SESSION", "Session created",
+                          data={"session_id": session_id,
+                                "exec": exec8})
 
     # ── 3. Send goal (prompt) ────────────────────────────────────────
     start_time = time.time()
@@ -394,9 +395,9 @@ def main() -> int:
     if not send_message_async(host, session_id, goal_text, agent=agent):
         msg = "Failed to send prompt to session"
         print(f"[db_admin] ERROR: {msg}", file=sys.stderr)
-        write_timeline_entry(timeline_path, "ERROR", msg,
-                             data={"session_id": session_id,
-                                   "exec": execution_id[:8]})
+        append_timeline_entry(timeline_path, "ERROR", msg,
+                              data={"session_id": session_id,
+                                    "exec": exec8})
         return 1
     print("[db_admin] ✓ Prompt sent")
 
@@ -424,15 +425,15 @@ def main() -> int:
     else:
         print("[db_admin] ⚠ No messages retrieved")
 
-    write_timeline_entry(timeline_path, "DONE",
-                         "db_admin execution finished", data={
-                             "session_id": session_id,
-                             "duration_seconds": round(duration, 2),
-                             "completed": completed,
-                             "messages_count": (len(messages)
-                                                if messages else 0),
-                             "exec": execution_id[:8],
-                         })
+    append_timeline_entry(timeline_path, "DONE",
+                          "db_admin execution finished", data={
+                              "session_id": session_id,
+                              "duration_seconds": round(duration, 2),
+                              "completed": completed,
+                              "messages_count": (len(messages)
+                                                 if messages else 0),
+                              "exec": exec8,
+                          })
 
     _active_session_id = None
     print("[db_admin] Done.")
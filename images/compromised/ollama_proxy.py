@@ -311,7 +311,9 @@ class Handler(BaseHTTPRequestHandler):
         pass
 
     def _send_json(self, status: int, data: dict):
-        payload = json.dumps(data).encode("utf-8")
+        self._send_json_bytes(status, json.dumps(data).encode("utf-8"))
+
+    def _send_json_bytes(self, status: int, payload: bytes):
         self.send_response(status)
         self.send_header("Content-Type", "application/json")
         self.send_header("Content-Length", str(len(payload)))
@@ -446,8 +448,11 @@ class Handler(BaseHTTPRequestHandler):
                 has_tool_calls = bool(
                     (result.get("message") or {}).get("tool_calls")
                 )
-                _log("RESP", f"native has_tool_calls={has_tool_calls} {json.dumps(result)[:500]}")
-                self._send_json(200, result)
+                # Serialize once: the log excerpt and the response body
+                # come from the same bytes (json.dumps output is ASCII).
+                payload = json.dumps(result).encode("utf-8")
+                _log("RESP", f"native has_tool_calls={has_tool_calls} {payload[:500].decode('ascii')}")
+                self._send_json_bytes(200, payload)
             except HTTPError as exc:
                 error_body = exc.read().decode("utf-8", errors="replace")
                 _log("ERR", f"Ollama HTTP {exc.code}: {error_body}")
@@ -468,11 +473,12 @@ class Handler(BaseHTTPRequestHandler):
         try:
             result = _forward_chat(body)
             has_tool_calls = bool(result.get("choices", [{}])[0].get("message", {}).get("tool_calls"))
-            _log("RESP", f"stream={stream_mode} has_tool_calls={has_tool_calls} {json.dumps(result)[:500]}")
+            payload = json.dumps(result).encode("utf-8")
+            _log("RESP", f"stream={stream_mode} has_tool_calls={has_tool_calls} {payload[:500].decode('ascii')}")
             if stream_mode:
                 self._send_sse_stream(result)
             else:
-                self._send_json(200, result)
+                self._send_json_bytes(200, payload)
         except HTTPError as exc:
             error_body = exc.read().decode("utf-8", errors="replace")
             _log("ERR", f"Ollama HTTP {exc.code}: {error_body}")
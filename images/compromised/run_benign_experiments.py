@@ -39,36 +39,33 @@ def check_progress(run_id: str, outputs_dir: Path):
     if not timeline_file.exists():
         return {"status": "running", "events": 0}
     
-    # Parse timeline to get status
-    events = []
-    try:
-        with open(timeline_file) as f:
-            for line in f:
-                if line.strip():
-                    events.append(json.loads(line))
-    except Exception as e:
-        return {"status": "reading", "error": str(e), "events": len(events)}
-    
-    # Extract key information
+    # Tally the timeline in one pass; polled while the run is in progress,
+    # so don't materialize the event list just to count it.
     status = {
         "status": "running",
-        "events": len(events),
+        "events": 0,
         "sessions": 0,
         "tool_calls": 0,
         "errors": 0,
     }
-    
-    for event in events:
-        event_type = event.get("type", "")
-        
-        if event_type == "SESSION":
-            status["sessions"] += 1
-        elif event_type == "tool_use":
-            status["tool_calls"] += 1
-        elif event_type in ("error", "ERROR"):
-            status["errors"] += 1
-        elif event_type == "DONE":
-            status["status"] = "completed"
+    try:
+        with open(timeline_file) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                event_type = json.loads(line).get("type", "")
+                status["events"] += 1
+
+                if event_type == "SESSION":
+                    status["sessions"] += 1
+                elif event_type == "tool_use":
+                    status["tool_calls"] += 1
+                elif event_type in ("error", "ERROR"):
+                    status["errors"] += 1
+                elif event_type == "DONE":
+                    status["status"] = "completed"
+    except Exception as e:
+        return {"status": "reading", "error": str(e), "events": status["events"]}
     
     return status
 
@@ -151,7 +151,15 @@ runuser -u postgres -- psql -d labdb -c "ALTER DEFAULT PRIVILEGES IN SCHEMA publ
 # Start the lab login app behind nginx.
 login_log=/var/log/flask-login.log
 touch "${login_log}"
-python3 /opt/flask_app/app.py >>"${login_log}" 2>&1 &
+if command -v gunicorn >/dev/null 2>&1; then
+  # Preforked workers with a thread pool each; no --preload so every worker
+  # starts its own login-log writer thread after the fork.
+  gunicorn --chdir /opt/flask_app -b 0.0.0.0:5000 \
+    -w "${FLASK_WORKERS:-$(nproc)}" -k gthread --threads "${FLASK_THREADS:-8}" \
+    wsgi:application >>"${login_log}" 2>&1 &
+else
+  python3 /opt/flask_app/app.py >>"${login_log}" 2>&1 &
+fi
 
 capture_log=/var/log/server-capture.log
 touch /var/log/nginx/access.log /var/log/nginx/error.log "${pg_log}" "${capture_log}"
@@ -1,13 +1,33 @@
 from flask import Flask, Response, request
+import atexit
+import gzip
+import hashlib
+import hmac
 import logging
 import os
 import json
+import queue
+import threading
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    _json_dumps = orjson.dumps
+else:
+    def _json_dumps(obj):
+        return json.dumps(obj).encode()
+
 app = Flask(__name__)
 
 EXPECTED_USER = os.environ.get("LOGIN_USER", "admin")
 EXPECTED_PASS = os.environ.get("LOGIN_PASSWORD", "admin")
+# Encoded once for hmac.compare_digest, which only takes ASCII str
+EXPECTED_USER_B = EXPECTED_USER.encode()
+EXPECTED_PASS_B = EXPECTED_PASS.encode()
 
 logging.basicConfig(
     level=logging.INFO,
@@ -17,6 +37,62 @@ logger = logging.getLogger("login_app")
 
 # Login attempts log file
 LOGIN_LOG_FILE = "/tmp/flask_login_attempts.jsonl"
+# Most lines the writer thread appends per os.write() call
+LOGIN_LOG_BATCH = 256
+
+# Serialized attempt lines waiting to be appended by the log writer thread
+_LOG_QUEUE = queue.SimpleQueue()
+# O_APPEND descriptor for LOGIN_LOG_FILE, opened on first use and kept open;
+# appends from several gunicorn workers land whole instead of interleaving.
+_LOG_FD = None
+
+
+def _append_login_log(data):
+    global _LOG_FD
+    if _LOG_FD is None:
+        _LOG_FD = os.open(LOGIN_LOG_FILE, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+    view = memoryview(data)
+    while view:
+        view = view[os.write(_LOG_FD, view):]
+
+
+def _write_login_batch(first):
+    lines = [first]
+    while len(lines) < LOGIN_LOG_BATCH:
+        try:
+            lines.append(_LOG_QUEUE.get_nowait())
+        except queue.Empty:
+            break
+    _append_login_log(b"".join(lines))
+
+
+def _login_log_writer():
+    """Append queued login attempts to LOGIN_LOG_FILE off the request path."""
+    while True:
+        line = _LOG_QUEUE.get()
+        try:
+            _write_login_batch(line)
+        except Exception as e:
+            logger.error("Failed to write login attempt log: %s", e)
+
+
+def _drain_login_log():
+    """Flush attempts still queued at shutdown."""
+    lines = []
+    while True:
+        try:
+            lines.append(_LOG_QUEUE.get_nowait())
+        except queue.Empty:
+            break
+    if lines:
+        try:
+            _append_login_log(b"".join(lines))
+        except OSError as e:
+            logger.error("Failed to write login attempt log: %s", e)
+
+
+threading.Thread(target=_login_log_writer, name="login-log-writer", daemon=True).start()
+atexit.register(_drain_login_log)
 
 LOGIN_FORM = """<!doctype html>
 <html lang="en">
@@ -35,15 +111,38 @@ LOGIN_FORM = """<!doctype html>
 </html>
 """
 
+# The form is static: encode, compress and tag both representations once
+LOGIN_FORM_BYTES = LOGIN_FORM.encode()
+LOGIN_FORM_GZ = gzip.compress(LOGIN_FORM_BYTES, mtime=0)
+_LOGIN_FORM_DIGEST = hashlib.md5(LOGIN_FORM_BYTES).hexdigest()
+LOGIN_FORM_ETAG = '"%s"' % _LOGIN_FORM_DIGEST
+LOGIN_FORM_GZ_ETAG = '"%s-gz"' % _LOGIN_FORM_DIGEST
+
+
+def _login_form_response():
+    gzip_ok = "gzip" in request.headers.get("Accept-Encoding", "")
+    etag = LOGIN_FORM_GZ_ETAG if gzip_ok else LOGIN_FORM_ETAG
+    headers = {"ETag": etag, "Vary": "Accept-Encoding"}
+    if etag in request.headers.get("If-None-Match", ""):
+        return Response(status=304, headers=headers)
+    if gzip_ok:
+        headers["Content-Encoding"] = "gzip"
+        return Response(LOGIN_FORM_GZ, headers=headers, mimetype="text/html")
+    return Response(LOGIN_FORM_BYTES, headers=headers, mimetype="text/html")
+
 
 @app.route("/login", methods=["GET", "POST"])
 def login():
     if request.method == "GET":
-        return Response(LOGIN_FORM, mimetype="text/html")
+        return _login_form_response()
 
     username = request.form.get("username", "")
     password = request.form.get("password", "")
     remote = request.remote_addr or "unknown"
+    # Constant-time compare; both checks always run (bitwise &, not "and")
+    success = hmac.compare_digest(username.encode(), EXPECTED_USER_B) & hmac.compare_digest(
+        password.encode(), EXPECTED_PASS_B
+    )
 
     # Log this attempt to JSONL file
     attempt_data = {
@@ -51,16 +150,12 @@ def login():
         "username": username,
         "password_len": len(password),
         "remote_addr": remote,
-        "success": username == EXPECTED_USER and password == EXPECTED_PASS
+        "success": success
     }
 
-    try:
-        with open(LOGIN_LOG_FILE, "a") as f:
-            f.write(json.dumps(attempt_data) + "\n")
-    except Exception as e:
-        logger.error("Failed to write login attempt log: %s", e)
+    _LOG_QUEUE.put(_json_dumps(attempt_data) + b"\n")
 
-    if username == EXPECTED_USER and password == EXPECTED_PASS:
+    if success:
         logger.info("login ok user=%s from=%s", username, remote)
         return "OK\n", 200
 
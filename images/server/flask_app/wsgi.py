@@ -0,0 +1,6 @@
+"""WSGI entry point for the lab login app.
+
+Run with, e.g.:
+    gunicorn -w "$(nproc)" -k gthread --threads 8 -b 0.0.0.0:5000 wsgi:application
+"""
+from app import app as application
@@ -5,9 +5,54 @@ Ensures consistent timeline file handling across all agents.
 
 import json
 import os
+import time
 from pathlib import Path
 from typing import Any, Dict, Optional, List
-from datetime import datetime
+
+
+_ts_second = -1
+_ts_prefix = ""
+
+
+def utc_timestamp() -> str:
+    """
+    Return the current UTC time in ``datetime.isoformat()`` layout.
+
+    The second-resolution prefix is formatted once per second and reused, so
+    the per-call cost is a single ``time.time_ns()`` call and an f-string.
+
+    Returns:
+        Timestamp such as ``2026-01-27T16:10:16.123456+00:00``
+    """
+    global _ts_second, _ts_prefix
+    seconds, nanos = divmod(time.time_ns(), 1_000_000_000)
+    if seconds != _ts_second:
+        _ts_prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(seconds))
+        _ts_second = seconds
+    return f"{_ts_prefix}.{nanos // 1000:06d}+00:00"
+
+
+def resolve_run_id(base_dir: str = "") -> str:
+    """
+    Resolve the current run ID.
+
+    Args:
+        base_dir: Trident base directory holding ``outputs/.current_run``
+            (default: the working directory)
+
+    Returns:
+        ``$RUN_ID`` if set, else the contents of ``outputs/.current_run``,
+        else ``"manual"``
+    """
+    run_id = os.environ.get("RUN_ID", "").strip()
+    if run_id:
+        return run_id
+    current_run = os.path.join(base_dir, "outputs", ".current_run")
+    try:
+        with open(current_run, "r", encoding="utf-8") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return "manual"
 
 
 def write_timeline_entry(
@@ -38,6 +83,34 @@ def write_timeline_entry(
         f.flush()
 
 
+def append_timeline_entry(
+    path: str,
+    level: str,
+    message: str,
+    data: Optional[Dict[str, Any]] = None
+) -> None:
+    """
+    Append a ``{"ts", "level", "msg", "data"}`` entry to a JSONL timeline.
+
+    Args:
+        path: Full path to the timeline file
+        level: Entry level (upper-cased, e.g. 'INIT', 'EXEC', 'ERROR')
+        message: Human-readable message
+        data: Optional payload stored under ``"data"``
+    """
+    entry: Dict[str, Any] = {
+        "ts": utc_timestamp(),
+        "level": level.upper(),
+        "msg": message,
+    }
+    if data:
+        entry["data"] = data
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry, separators=(',', ':')) + '\n')
+        f.flush()
+
+
 def read_timeline_entries(
     dir: str,
     filename: str,
@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import os
 import sys
 import time
 from typing import Optional, Any, Dict
@@ -26,13 +25,8 @@ class PlanResponse(BaseModel):
 
 
 def _build_planner() -> IncidentPlanner:
-    cfg = PlannerConfig()
-    base_url = cfg.openai_base_url
-    if base_url:
-        os.environ.setdefault("LLM_URL", base_url)
-    if cfg.openai_api_key:
-        os.environ.setdefault("OPENAI_API_KEY", cfg.openai_api_key)
-    return IncidentPlanner(cfg)
+    # IncidentPlanner exports LLM_URL/OPENAI_API_KEY from the config itself
+    return IncidentPlanner(PlannerConfig())
 
 
 app = FastAPI(title="LLM Defender Planner", version="0.1.0")
@@ -62,7 +56,7 @@ def healthz() -> Dict[str, Any]:
 
 
 @app.post("/plan", response_model=PlanResponse)
-def plan(req: PlanRequest, http_request: Request) -> Any:
+async def plan(req: PlanRequest, http_request: Request) -> Any:
     request_start = time.time()
 
     # Log incoming request details
@@ -78,8 +72,8 @@ def plan(req: PlanRequest, http_request: Request) -> Any:
         raise HTTPException(status_code=400, detail="alert must be non-empty")
 
     try:
-        print(f"[PLAN_ENDPOINT] Calling planner.plan()...", flush=True)
-        out = planner.plan(req.alert.strip(), temperature=req.temperature, max_tokens=req.max_tokens)
+        print(f"[PLAN_ENDPOINT] Calling planner.aplan()...", flush=True)
+        out = await planner.aplan(req.alert.strip(), temperature=req.temperature, max_tokens=req.max_tokens)
 
         # Log output details
         duration = time.time() - request_start
@@ -1,20 +1,27 @@
 from __future__ import annotations
 
+import asyncio
+import functools
+import hashlib
+import json
 import os
+import re
 import sys
+import time
 import uuid
 import threading
+from collections import OrderedDict
 from dataclasses import dataclass
-from datetime import datetime, timezone
-from typing import Optional, Dict, Any, List
+from typing import Callable, Optional, Dict, Any, List
 
+import httpx
 from dotenv import load_dotenv
 
 # LangChain core + OpenAI-compatible chat model
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.messages import BaseMessage
+from langchain_core.messages import BaseMessage, HumanMessage
 
 
 load_dotenv()  # Load .env if present; intentionally early to set env for model
@@ -42,10 +49,126 @@ class PlannerConfig:
     langfuse_trace_name: str = os.getenv("LANGFUSE_TRACE_NAME", "incident_planner")
     # Async Langfuse flush (non-blocking) - default enabled for performance
     langfuse_async_flush: bool = _is_truthy(os.getenv("LANGFUSE_ASYNC_FLUSH"), default=True)
+    # Exact-match plan cache for repeated alerts (TTL 0 disables it)
+    plan_cache_ttl: float = float(os.getenv("PLAN_CACHE_TTL", "600"))
+    plan_cache_size: int = int(os.getenv("PLAN_CACHE_SIZE", "256"))
 
 
 import yaml
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# orjson.JSONDecodeError subclasses ValueError like json's, so callers'
+# except clauses are unaffected.
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+
+# (unix second, "YYYY-MM-DDTHH:MM:SS") of the last formatted timestamp
+_created_prefix = (-1, "")
+
+
+def _utc_created() -> str:
+    """``datetime.now(timezone.utc).isoformat()`` layout, reusing the per-second prefix."""
+    global _created_prefix
+    seconds, nanos = divmod(time.time_ns(), 1_000_000_000)
+    cached_second, prefix = _created_prefix
+    if seconds != cached_second:
+        prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(seconds))
+        _created_prefix = (seconds, prefix)
+    return f"{prefix}.{nanos // 1000:06d}+00:00"
+
+
+@functools.lru_cache(maxsize=1)
+def _shared_http_clients() -> tuple[httpx.Client, httpx.AsyncClient]:
+    """Process-wide keep-alive pools shared by every planner ChatOpenAI client."""
+    limits = httpx.Limits(max_connections=64, max_keepalive_connections=32)
+    return httpx.Client(limits=limits), httpx.AsyncClient(limits=limits)
+
+
+_ENV_INITIALIZED = False
+
+
+def _init_llm_env(config: PlannerConfig) -> None:
+    """Export the endpoint settings for OpenAI-compatible clients, once per process."""
+    global _ENV_INITIALIZED
+    if _ENV_INITIALIZED:
+        return
+    if config.openai_base_url:
+        os.environ.setdefault("LLM_URL", config.openai_base_url)
+    if config.openai_api_key:
+        os.environ.setdefault("OPENAI_API_KEY", config.openai_api_key)
+    _ENV_INITIALIZED = True
+
+
+@functools.lru_cache(maxsize=8)
+def _read_prompts(path: str, mtime_ns: Optional[int]) -> tuple[str, str]:
+    """Parse prompts.yaml; cached per (path, mtime) so planners share one parse."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = yaml.safe_load(f) or {}
+        system = str(data.get("system", "")).strip()
+        human = str(data.get("human", "")).strip()
+        if not system or not human:
+            raise ValueError("Prompts missing 'system' or 'human' keys")
+        return system, human
+    except Exception as e:
+        # Provide a minimal fallback that mirrors our constraints
+        fallback_system = (
+            "Return JSON with executor_host_ip and plan only. No code. Stop attack and prevent recurrence."
+        )
+        fallback_human = "IDS alert:\n{alert}"
+        return fallback_system, fallback_human
+
+
+@functools.lru_cache(maxsize=8)
+def _build_prompt(sys_tmpl: str, human_tmpl: str) -> ChatPromptTemplate:
+    return ChatPromptTemplate.from_messages([
+        ("system", sys_tmpl),
+        ("human", human_tmpl),
+    ])
+
+
+_JSON_DECODER = json.JSONDecoder()
+# Reasoning models may emit a <think>...</think> preamble before the JSON
+_THINK_RE = re.compile(r"<think>.*?</think>", re.DOTALL)
+
+
+def _extract_json_object(text: str) -> Dict[str, Any]:
+    """Return the first JSON object in *text*, ignoring surrounding prose.
+
+    Decodes in one pass from the first ``{`` (trailing text is ignored); if
+    that fails, falls back to the outermost ``{...}`` slice, then the whole
+    text. Raises when none of them is a JSON object.
+    """
+    if "<think>" in text:
+        text = _THINK_RE.sub("", text)
+    start = text.find("{")
+    if start != -1:
+        try:
+            obj, _ = _JSON_DECODER.raw_decode(text, start)
+            if isinstance(obj, dict):
+                return obj
+        except ValueError:
+            pass
+    end = text.rfind("}")
+    obj = _json_loads(text[start:end + 1] if start != -1 and end != -1 and end > start else text)
+    if not isinstance(obj, dict):
+        raise ValueError("planner output is not a JSON object")
+    return obj
+
+
+@dataclass
+class _PlanCall:
+    """Per-request state shared by the sync and async planning paths."""
+    request_id: str
+    config: Dict[str, Any]
+    messages: List[BaseMessage]
+    generation: Optional[Any]
+    log: Callable[[str], None]
+
 
 class IncidentPlanner:
     """
@@ -58,11 +181,9 @@ class IncidentPlanner:
         self.prompts_path = prompts_path or os.getenv("PROMPTS_PATH", os.path.join(os.path.dirname(os.path.dirname(__file__)), "prompts.yaml"))
 
         # Ensure environment variables are set for OpenAI-compatible clients
-        if self.config.openai_base_url:
-            os.environ.setdefault("LLM_URL", self.config.openai_base_url)
-        if self.config.openai_api_key:
-            os.environ.setdefault("OPENAI_API_KEY", self.config.openai_api_key)
+        _init_llm_env(self.config)
 
+        http_client, http_async_client = _shared_http_clients()
         # Build the model
         # NOTE: timeout is set to 30s to accommodate gpt-oss-120b cold starts (4-5s) and network conditions
         # LangChain's default timeout is 10s which can cause empty responses on slow LLM responses
@@ -74,25 +195,106 @@ class IncidentPlanner:
             base_url=self.config.openai_base_url,
             api_key=self.config.openai_api_key,
             timeout=30.0,
+            http_client=http_client,
+            http_async_client=http_async_client,
                     )
+        # Per-request temperature/max_tokens overrides reuse one client per
+        # setting instead of building (and re-pooling) a new one each time.
+        self._llm_for = functools.lru_cache(maxsize=16)(self._build_override_llm)
 
         # Load prompts from YAML (one-shot prompt)
         sys_tmpl, human_tmpl = self._load_prompts(self.prompts_path)
 
-        self.prompt = ChatPromptTemplate.from_messages([
-            ("system", sys_tmpl),
-            ("human", human_tmpl),
-        ])
+        self.prompt = _build_prompt(sys_tmpl, human_tmpl)
+        # The system message never changes: render it once and only format
+        # the human template per request.
+        self._system_msg = self.prompt.messages[0].format()
+        self._human_tmpl = human_tmpl
         self.langfuse_client: Optional[Any] = None
         self.langfuse_callback = self._build_langfuse_callback()
 
         self.chain = self.prompt | self.llm | StrOutputParser()
+        self._text_llm = self.llm | StrOutputParser()
+        self._plan_cache: "OrderedDict[bytes, tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._plan_cache_lock = threading.Lock()
 
     def plan(self, alert: str, *, temperature: Optional[float] = None, max_tokens: Optional[int] = None) -> Dict[str, Any]:
+        cache_key = self._plan_cache_key(alert, temperature, max_tokens)
+        cached = self._cached_plan(cache_key)
+        if cached is not None:
+            return cached
+        call = self._start_call(alert, temperature, max_tokens)
+        try:
+            # Allow per-request overrides
+            if temperature is not None or max_tokens is not None:
+                llm = self._override_llm(temperature, max_tokens)
+                result_message = llm.invoke(call.messages, config=call.config)
+                result_text = self._extract_result_text(result_message)
+            else:
+                result_text = self._text_llm.invoke(call.messages, config=call.config)
+            self._record_output(call, result_text)
+        finally:
+            self._end_call(call)
+        return self._store_plan(cache_key, self._build_result(result_text, call.request_id))
+
+    async def aplan(self, alert: str, *, temperature: Optional[float] = None, max_tokens: Optional[int] = None) -> Dict[str, Any]:
+        """Async :meth:`plan`; log file writes run in a worker thread."""
+        cache_key = self._plan_cache_key(alert, temperature, max_tokens)
+        cached = self._cached_plan(cache_key)
+        if cached is not None:
+            return cached
+        call = await asyncio.to_thread(self._start_call, alert, temperature, max_tokens)
+        try:
+            if temperature is not None or max_tokens is not None:
+                llm = self._override_llm(temperature, max_tokens)
+                result_message = await llm.ainvoke(call.messages, config=call.config)
+                result_text = self._extract_result_text(result_message)
+            else:
+                result_text = await self._text_llm.ainvoke(call.messages, config=call.config)
+            await asyncio.to_thread(self._record_output, call, result_text)
+        finally:
+            self._end_call(call)
+        return self._store_plan(cache_key, self._build_result(result_text, call.request_id))
+
+    @staticmethod
+    def _plan_cache_key(alert: str, temperature: Optional[float], max_tokens: Optional[int]) -> bytes:
+        digest = hashlib.blake2b(f"{temperature}|{max_tokens}|".encode(), digest_size=16)
+        digest.update(alert.encode("utf-8"))
+        return digest.digest()
+
+    def _cached_plan(self, key: bytes) -> Optional[Dict[str, Any]]:
+        """Return a cached plan for an identical alert, with fresh request metadata."""
+        if self.config.plan_cache_ttl <= 0:
+            return None
+        with self._plan_cache_lock:
+            entry = self._plan_cache.get(key)
+            if entry is None:
+                return None
+            stored_at, result = entry
+            if time.monotonic() - stored_at > self.config.plan_cache_ttl:
+                del self._plan_cache[key]
+                return None
+            self._plan_cache.move_to_end(key)
+        request_id = str(uuid.uuid4())
+        print(f"[PLANNER_CACHE_HIT] request_id={request_id}", file=sys.stderr, flush=True)
+        return {
+            **result,
+            "request_id": request_id,
+            "created": _utc_created(),
+        }
+
+    def _store_plan(self, key: bytes, result: Dict[str, Any]) -> Dict[str, Any]:
+        # Unparsed (fallback) replies are not cached so a retry can do better
+        if self.config.plan_cache_ttl > 0 and result.get("executor_host_ip"):
+            with self._plan_cache_lock:
+                self._plan_cache[key] = (time.monotonic(), result)
+                self._plan_cache.move_to_end(key)
+                while len(self._plan_cache) > self.config.plan_cache_size:
+                    self._plan_cache.popitem(last=False)
+        return result
+
+    def _start_call(self, alert: str, temperature: Optional[float], max_tokens: Optional[int]) -> _PlanCall:
         # Log the exact alert being sent to planner
-        import sys
-        import os
-        
         # Log file path
         log_file = f"/outputs/{os.getenv('RUN_ID', 'run')}/logs/planner_llm_detailed.log"
         os.makedirs(os.path.dirname(log_file), exist_ok=True)
@@ -122,7 +324,7 @@ class IncidentPlanner:
         log_msg(f"[ALERT_TEXT_END]")
          
         # Build formatted prompt messages (always, for logging purposes)
-        formatted_messages = self.prompt.format_messages(alert=alert)
+        formatted_messages = [self._system_msg, HumanMessage(content=self._human_tmpl.format(alert=alert))]
         formatted_prompt_text = self._serialize_prompt_messages(formatted_messages)
         log_msg(f"[LLM_FULL_FORMATTED_PROMPT_START]")
         log_msg(formatted_prompt_text)
@@ -136,42 +338,29 @@ class IncidentPlanner:
             temperature=temperature,
             max_tokens=max_tokens,
         )
-        try:
-            # Allow per-request overrides
-            if temperature is not None or max_tokens is not None:
-                llm = ChatOpenAI(
-                    model=self.config.model,
-                    temperature=temperature if temperature is not None else self.config.temperature,
-                    max_tokens=max_tokens if max_tokens is not None else self.config.max_tokens,
-                    base_url=self.config.openai_base_url,
-                    api_key=self.config.openai_api_key,
-                                )
-                result_message = llm.invoke(formatted_messages, config=invoke_config)
-                result_text = self._extract_result_text(result_message)
-            else:
-                result_text = self.chain.invoke({"alert": alert}, config=invoke_config)
-            
-            if langfuse_generation is not None:
-                langfuse_generation.update(output=result_text)
-            
-            log_msg(f"[LLM_OUTPUT_START]")
-            log_msg(result_text)
-            log_msg(f"[LLM_OUTPUT_END]")
-            log_msg(f"[PLANNER_LLM_INPUT_END]")
-        finally:
-            if langfuse_generation is not None:
-                langfuse_generation.end()
-            self._flush_langfuse()
+        return _PlanCall(request_id, invoke_config, formatted_messages, langfuse_generation, log_msg)
 
+    @staticmethod
+    def _record_output(call: _PlanCall, result_text: str) -> None:
+        if call.generation is not None:
+            call.generation.update(output=result_text)
+        
+        call.log(f"[LLM_OUTPUT_START]")
+        call.log(result_text)
+        call.log(f"[LLM_OUTPUT_END]")
+        call.log(f"[PLANNER_LLM_INPUT_END]")
+
+    def _end_call(self, call: _PlanCall) -> None:
+        if call.generation is not None:
+            call.generation.end()
+        self._flush_langfuse()
+
+    def _build_result(self, result_text: str, request_id: str) -> Dict[str, Any]:
         # Parse strict JSON: {"executor_host_ip": "...", "plan": "..."}
         executor_host_ip: str = ""
         plan_text: str = ""
         try:
-            import json
-            # be resilient to any leading/trailing text
-            start = result_text.find("{")
-            end = result_text.rfind("}")
-            obj = json.loads(result_text[start:end + 1] if start != -1 and end != -1 and end > start else result_text)
+            obj = _extract_json_object(result_text)
             executor_host_ip = str(obj.get("executor_host_ip", "") or "")
             plan_text = str(obj.get("plan", "") or "")
         except Exception:
@@ -183,26 +372,37 @@ class IncidentPlanner:
             "plan": plan_text,
             "model": self.config.model,
             "request_id": request_id,
-            "created": datetime.now(timezone.utc).isoformat(),
+            "created": _utc_created(),
         }
 
+    def _override_llm(self, temperature: Optional[float], max_tokens: Optional[int]) -> ChatOpenAI:
+        return self._llm_for(
+            temperature if temperature is not None else self.config.temperature,
+            max_tokens if max_tokens is not None else self.config.max_tokens,
+        )
+
+    def _build_override_llm(self, temperature: float, max_tokens: int) -> ChatOpenAI:
+        if temperature == self.config.temperature and max_tokens == self.config.max_tokens:
+            return self.llm
+        http_client, http_async_client = _shared_http_clients()
+        return ChatOpenAI(
+            model=self.config.model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            base_url=self.config.openai_base_url,
+            api_key=self.config.openai_api_key,
+            timeout=30.0,
+            http_client=http_client,
+            http_async_client=http_async_client,
+        )
+
     @staticmethod
     def _load_prompts(path: str) -> tuple[str, str]:
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = yaml.safe_load(f) or {}
-            system = str(data.get("system", "")).strip()
-            human = str(data.get("human", "")).strip()
-            if not system or not human:
-                raise ValueError("Prompts missing 'system' or 'human' keys")
-            return system, human
-        except Exception as e:
-            # Provide a minimal fallback that mirrors our constraints
-            fallback_system = (
-                "Return JSON with executor_host_ip and plan only. No code. Stop attack and prevent recurrence."
-            )
-            fallback_human = "IDS alert:\n{alert}"
-            return fallback_system, fallback_human
+            mtime_ns: Optional[int] = os.stat(path).st_mtime_ns
+        except OSError:
+            mtime_ns = None
+        return _read_prompts(path, mtime_ns)
 
     @staticmethod
     def _extract_result_text(result: Any) -> str:
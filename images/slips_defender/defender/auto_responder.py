@@ -12,34 +12,67 @@ Uses the OpenCode server HTTP API (https://opencode.ai/docs/server/)
 instead of SSH+pexpect for remote execution.
 """
 
+import concurrent.futures
+import contextlib
 import json
+import atexit
+import ctypes
+import ctypes.util
+import functools
 import os
+import queue
+import re
+import select
+import struct
 import time
 import threading
 import hashlib
+from collections import OrderedDict
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
-from typing import Callable, Dict, List, Optional, Set, Tuple, Any
+from typing import Callable, Dict, List, NamedTuple, Optional, Set, Tuple, Any
 import requests
+from requests.adapters import HTTPAdapter
 import logging
 import sys
 
-# Import shared types
-SHARED_TYPES_PATH = Path("/images/shared/types.py")
-if not SHARED_TYPES_PATH.exists():
-    SHARED_TYPES_PATH = Path(__file__).parent.parent.parent.parent / "images" / "shared" / "types.py"
-if SHARED_TYPES_PATH.exists():
-    sys.path.insert(0, str(SHARED_TYPES_PATH.parent))
-    from types import AgentMetrics, ensure_full_metrics
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# orjson.JSONDecodeError subclasses ValueError, as json's does
+if orjson is not None:
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
 else:
+    _json_loads = json.loads
+
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode()
+
+# Import shared modules as the ``shared`` package: putting images/shared
+# itself on sys.path made ``from types import ...`` resolve to the stdlib
+# ``types`` module (already imported by the interpreter) and fail.
+_shared_paths = [
+    "/opt",  # Inside Docker container (shared is at /opt/shared/)
+    os.path.join(os.path.dirname(__file__), "..", ".."),  # Local development (images/)
+]
+for _path in _shared_paths:
+    if os.path.isdir(os.path.join(_path, "shared")) and _path not in sys.path:
+        sys.path.insert(0, _path)
+
+try:
+    from shared.types import AgentMetrics, ensure_full_metrics
+except ImportError:
     # Fallback if types.py not available
     AgentMetrics = Dict[str, Any]  # type: ignore
     def ensure_full_metrics(m): return m  # type: ignore
 
 # Import shared constants and utilities
 try:
-    from constants import GRACE_PERIOD_SECONDS
-    from opencode_utils import (
+    from shared.constants import GRACE_PERIOD_SECONDS
+    from shared.opencode_utils import (
         RETRY_DELAYS, check_for_model_error, ModelAvailabilityError,
         convert_api_messages_to_legacy_jsonl
     )
@@ -55,6 +88,11 @@ except ImportError:
 RUN_ID = os.getenv("RUN_ID", "run_local")
 ALERT_FILE = Path("/outputs") / RUN_ID / "slips" / "defender_alerts.ndjson"
 PROCESSED_FILE = Path("/outputs") / RUN_ID / "processed_alerts.json"
+# Append-only log of entries added since PROCESSED_FILE was last rewritten
+PROCESSED_JOURNAL = PROCESSED_FILE.with_suffix(".log")
+PROCESSED_COMPACT_EVERY = int(os.getenv("PROCESSED_COMPACT_EVERY", "500"))
+# Recorded in PROCESSED_FILE; snapshots without it hold md5 alert hashes
+PROCESSED_HASH_FORMAT = "blake2b-fields"
 PLANNER_URL = os.getenv("PLANNER_URL", "http://127.0.0.1:1654/plan")
 PLANNER_REQUEST_TIMEOUT = float(os.getenv("PLANNER_REQUEST_TIMEOUT", "45"))
 PLANNER_REQUEST_RETRIES = int(os.getenv("PLANNER_REQUEST_RETRIES", "2"))
@@ -73,15 +111,315 @@ OPENCODE_SERVER_PORT = int(os.getenv("OPENCODE_SERVER_PORT", "4096"))
 # Network topology (fixed IPs, not configurable via env)
 OPENCODE_SERVER_HOST = "172.31.0.10"
 OPENCODE_COMPROMISED_HOST = "172.30.0.10"
+# Executor IP /24 prefix -> (OpenCode host, machine name); any other executor
+# is sent to the server
+TARGETS_BY_SUBNET = {
+    "172.31.0": (OPENCODE_SERVER_HOST, "server"),
+    "172.30.0": (OPENCODE_COMPROMISED_HOST, "compromised"),
+}
 
 # OpenCode status polling
 OPENCODE_STATUS_POLL_INTERVAL = float(os.getenv("OPENCODE_STATUS_POLL_INTERVAL", "3"))
+# Upper bound on plans executing at once across all alerts
+PLAN_EXECUTION_WORKERS = int(os.getenv("PLAN_EXECUTION_WORKERS", "16"))
+
+# Prompt sent to the soc_god agent with each remediation plan
+REMEDIATION_PROMPT_TEMPLATE = """Execute this security remediation plan immediately:
+
+PLAN: {plan}
+
+CONTEXT:
+- Alert Source IP: {source_ip}
+- Alert Target IP: {dest_ip}
+- Attack Type: {attack_id}
+- Target Machine: {target_name} ({target_ip})
+- Target IP: {target_ip}
+
+**ABSOLUTE PROHIBITIONS - DO NOT VIOLATE:**
+- **NEVER STOP OR RESTART SSH SERVICE**
+- **NEVER STOP OR RESTART HTTP/HTTPS SERVICES**
+- **NEVER KILL THE OPENCODE PROCESS** - Do NOT run: kill, pkill, or killall against the 'opencode' process. It is the agent controlling you.
+- **NEVER BLOCK PORT 4096/tcp** - This is the OpenCode server API port. Blocking it will terminate your own execution.
+- **NEVER BLOCK TRAFFIC TO/FROM YOUR OWN IP ADDRESS**
+- **NEVER DELETE OR MODIFY CRITICAL SYSTEM FILES** - Preserve monitoring and logging files:
+  - /tmp/system_monitor.sh
+  - /tmp/flask_attack_log.txt
+  - /tmp/flask_attack_summary.json
+  - /tmp/flask_login_attempts.jsonl
+  - /tmp/flask_bruteforce/monitoring.json
+  These files are essential for security forensics and incident analysis.
+
+**CRITICAL FIREWALL RULES - FOLLOW EXACTLY:**
+- **Maintain SSH (port 22), HTTPS (port 443), and OpenCode (port 4096) connectivity above all else**
+- **INPUT chain:** Use to block traffic FROM specific source IPs - SAFE
+- **OUTPUT chain:** Use to block traffic TO specific destination IPs - SAFE if NOT your own IP
+- **NEVER use 0.0.0.0/0 as destination**
+- **FORBIDDEN:** iptables -A INPUT -p tcp --dport 4096 -j DROP (blocks OpenCode API - kills your agent)
+
+Execute all containment and remediation steps immediately. Be decisive and thorough. After containment and remediation, take at least 1 extra creative step, it can be deception, counter attacking, etc. Basic containment is not enough."""
+
+# Indicators looked for in a lowercased OpenCode session status, each set
+# matched in one pass
+_SESSION_DONE_RE = re.compile("completed|idle|ready|done")
+_SESSION_ERROR_RE = re.compile("error|failed")
+_SESSION_BUSY_RE = re.compile("busy|pending|running|active|generating")
+
+# Patterns for pulling IPs, timestamps and the detection out of SLIPS "raw"
+# alert text, compiled once instead of looked up on every alert
+_IP_RE = re.compile(r'(\d+\.\d+\.\d+\.\d+)')
+_SRC_IP_RE = re.compile(r'Src IP\s+(\d+\.\d+\.\d+\.\d+)')
+_TO_IP_RE = re.compile(r'to IP\s+(\d+\.\d+\.\d+\.\d+)')
+_TO_IP_PORT_RE = re.compile(r'to\s+(\d+\.\d+\.\d+\.\d+):\d+')
+_TS_RE = re.compile(r'(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2})')
+_DETECTED_RE = re.compile(r'detected\s+(.+?)(?:\.|threat level|$)')
+_NUMBER_RE = re.compile(r'\b\d+\b')
+_SPACES_RE = re.compile(r'\s+')
+# Fallback attack types for alerts without a "Detected ..." phrase, in
+# priority order
+_ATTACK_KEYWORDS = tuple((re.compile(pattern), label) for pattern, label in (
+    ("horizontal port scan", "horizontal_port_scan"),
+    ("vertical port scan",   "vertical_port_scan"),
+    ("password guessing",    "password_guessing"),
+    ("brute force",          "brute_force"),
+    ("denial of service",    "dos"),
+    ("ddos",                 "dos"),
+    ("icmp.*scan",           "icmp_scan"),
+    ("port scan",            "port_scan"),
+    ("ssh",                  "ssh_attack"),
+))
+
+
+class _RawAlertFields(NamedTuple):
+    src_ip: Optional[str]     # from "Src IP a.b.c.d"
+    to_ip: Optional[str]      # from "to IP a.b.c.d" or "to a.b.c.d:port"
+    ips: Tuple[str, ...]      # every IP, in order of appearance
+    timestamp: Optional[str]  # first YYYY-MM-DDTHH:MM:SS
+
+
+@functools.lru_cache(maxsize=256)
+def _parse_raw(raw: str) -> _RawAlertFields:
+    """Extract the IPs and timestamp from a SLIPS raw alert line.
+
+    One alert's raw text is consulted by get_threat_hash (twice per poll),
+    process_alert and format_alert_for_planner; the cache runs the regexes
+    once per distinct line.
+    """
+    src_match = _SRC_IP_RE.search(raw)
+    to_match = _TO_IP_RE.search(raw) or _TO_IP_PORT_RE.search(raw)
+    time_match = _TS_RE.search(raw)
+    return _RawAlertFields(
+        src_match.group(1) if src_match else None,
+        to_match.group(1) if to_match else None,
+        tuple(_IP_RE.findall(raw)),
+        time_match.group(1) if time_match else None,
+    )
+
+
+class _HashBloom:
+    """Fixed-size Bloom filter over 32-hex-digit digests such as alert hashes.
+
+    The digests are already uniformly distributed, so the bit positions are
+    read from four disjoint 8-digit slices instead of hashing again. With
+    the default 2**20 bits, 10k members give a false-positive rate near 1e-6.
+    """
+
+    def __init__(self, bits_log2: int = 20):
+        self._mask = (1 << bits_log2) - 1
+        self._bits = bytearray((self._mask + 1) >> 3)
+
+    @classmethod
+    def for_members(cls, digests) -> "_HashBloom":
+        """Build a filter holding ``digests`` with room for as many again."""
+        digests = list(digests)
+        bits_log2 = 20
+        # Bit positions come from 32-bit slices, so 2**32 bits is the ceiling
+        while bits_log2 < 32 and (1 << bits_log2) // 100 < 2 * len(digests):
+            bits_log2 += 1
+        bloom = cls(bits_log2)
+        for digest in digests:
+            bloom.add(digest)
+        return bloom
+
+    @property
+    def capacity(self) -> int:
+        # About 100 bits per member keeps false positives near 1e-6
+        return (self._mask + 1) // 100
+
+    def _positions(self, digest: str):
+        for start in (0, 8, 16, 24):
+            yield int(digest[start:start + 8], 16) & self._mask
+
+    def add(self, digest: str) -> None:
+        try:
+            positions = list(self._positions(digest))
+        except ValueError:
+            # Not a hex digest; __contains__ always defers those to the caller
+            return
+        for pos in positions:
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, digest: str) -> bool:
+        try:
+            return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(digest))
+        except ValueError:
+            # Not a hex digest: let the caller consult its exact set
+            return True
+
+
+class _DirWatcher:
+    """Waits for one file in a directory to change, with a timeout.
+
+    Uses Linux inotify through libc, so an appended alert wakes the loop
+    right away and idle periods cost no wake-ups. The watch is on the
+    directory (the file may not exist yet or be replaced), and events for
+    its other files are read and ignored. Where inotify is not available
+    (or the directory does not exist yet) ``active`` is False and wait()
+    simply sleeps, which is the plain polling loop.
+    """
+
+    # IN_MODIFY | IN_MOVED_TO | IN_CREATE
+    _MASK = 0x002 | 0x080 | 0x100
+    # Set when the kernel dropped events; the change may have been ours
+    _IN_Q_OVERFLOW = 0x4000
+    # struct inotify_event header: wd, mask, cookie, len
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self, path: Path):
+        self._fd = -1
+        self._name = os.fsencode(path.name)
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+            if fd < 0:
+                return
+            if libc.inotify_add_watch(fd, os.fsencode(path.parent), self._MASK) < 0:
+                os.close(fd)
+                return
+            self._fd = fd
+        except (OSError, AttributeError):
+            pass
+
+    @property
+    def active(self) -> bool:
+        return self._fd >= 0
+
+    def wait(self, timeout: float) -> None:
+        if self._fd < 0:
+            time.sleep(timeout)
+            return
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            ready, _, _ = select.select([self._fd], [], [], remaining)
+            if not ready or self._drain():
+                return
+
+    def _drain(self) -> bool:
+        """Read every queued event; True if one concerns the watched file."""
+        hit = False
+        try:
+            while True:
+                buf = os.read(self._fd, 4096)
+                if not buf:
+                    break
+                offset = 0
+                while offset + self._EVENT.size <= len(buf):
+                    _, mask, _, name_len = self._EVENT.unpack_from(buf, offset)
+                    offset += self._EVENT.size
+                    name = buf[offset:offset + name_len].rstrip(b"\0")
+                    offset += name_len
+                    if name == self._name or mask & self._IN_Q_OVERFLOW:
+                        hit = True
+        except BlockingIOError:
+            pass
+        return hit
+
+
+# Most queued timeline lines the writer thread takes per wake-up
+TIMELINE_WRITE_BATCH = 256
+
+# Alert fields that identify one SLIPS alert for deduplication
+ALERT_KEY_FIELDS = ("attackid", "destip", "proto", "sourceip", "timestamp")
+
+# Lowercased alert text containing any of these is acted upon
+HIGH_CONFIDENCE_PATTERNS = (
+    "confidence: 1",
+    "confidence: 0.9",
+    "confidence: 0.8",
+    "confidence: 1.0",
+    "threat level: high",
+    "threat_level: high",
+    "high entropy",
+    "entropy: 5",  # DNS TXT with entropy >= 5 is suspicious
+    "vertical port scan",
+    "horizontal port scan",
+    "denial of service",
+    "ddos",
+    "brute force",
+    "password guessing",
+)
+# One alternation scans the text once instead of once per pattern. It runs
+# over UTF-8 bytes: the patterns are ASCII, and bytes.lower() is a plain
+# ASCII table lookup, cheaper than Unicode-aware str.lower().
+_HIGH_CONFIDENCE_RE = re.compile(
+    "|".join(map(re.escape, HIGH_CONFIDENCE_PATTERNS)).encode("ascii")
+)
 
 
 class AutoResponder:
+    """Polls SLIPS alerts, asks the planner for plans and runs them via OpenCode.
+
+    Alert intake and dedup state (processed_alerts, threat_history, the
+    journal buffer) is only touched by the single thread running run(), so
+    it is not locked. ``lock`` guards ``active_sessions``, which the
+    background plan-execution threads share.
+    """
+
     def __init__(self):
+        # (timeline path, encoded line) pairs for the background writer
+        self._timeline_queue: "queue.SimpleQueue[Optional[Tuple[Path, bytes]]]" = queue.SimpleQueue()
+        self._timeline_thread = threading.Thread(
+            target=self._timeline_writer, name="timeline-writer", daemon=True
+        )
+        self._timeline_thread.start()
+        atexit.register(self._stop_timeline_writer)
+
+        # One pooled session for the planner and the OpenCode servers, so
+        # each request reuses a kept-alive connection instead of opening one
+        self._http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+        self._http.mount("http://", adapter)
+        self._http.mount("https://", adapter)
+
+        # Shared by every alert's plans; submit() never blocks run()
+        self._exec_pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=PLAN_EXECUTION_WORKERS, thread_name_prefix="plan-exec"
+        )
+
         self.processed_alerts: Set[str] = set()
-        self.threat_history: Dict[str, datetime] = {}
+        # Answers "never processed" for most new alerts without touching
+        # the exact set; kept in step with processed_alerts by mark_processed
+        self._processed_bloom = _HashBloom()
+        # threat_hash -> last recorded time, oldest first, so expired threats
+        # are evicted from the front instead of scanning the whole dict
+        self.threat_history: "OrderedDict[str, datetime]" = OrderedDict()
+        # Byte offset of the first unread line in ALERT_FILE, and the alerts
+        # read so far that are still waiting to be processed (by alert hash)
+        self._alert_offset = 0
+        self._pending_alerts: Dict[str, Dict] = {}
+        # (st_size, st_mtime_ns) of ALERT_FILE when it was last read
+        self._alert_stat: Tuple[int, int] = (-1, -1)
+        self._alert_inode: Optional[int] = None
+        # Journal lines ("a <alert_hash>" / "t <threat_hash> <iso time>") not
+        # yet saved, and the number already in PROCESSED_JOURNAL
+        self._unsaved: List[str] = []
+        self._journal_entries = 0
+        # Hashes from a snapshot written before blake2b keys, which may be
+        # md5 keys; only consulted until ALERT_FILE has been read through
+        # once (see _migrate_legacy_hash)
+        self._legacy_processed: Set[str] = set()
         self.lock = threading.Lock()
         self.setup_logging()
         self.load_processed_alerts()
@@ -133,9 +471,47 @@ class AutoResponder:
             entry["exec"] = execution_id[:8]
         if data:
             entry["data"] = data
-        with open(timeline_path, "a", encoding="utf-8") as handle:
-            handle.write(json.dumps(entry, separators=(",", ":")) + "\n")
-            handle.flush()
+        # Serialized here so later changes to ``data`` cannot leak into the
+        # entry; the file I/O itself happens on the writer thread.
+        self._timeline_queue.put((timeline_path, _json_dumps(entry) + b"\n"))
+
+    def _timeline_writer(self) -> None:
+        """Append queued timeline lines, keeping one open handle per file.
+
+        Everything already queued is written with one write() per file and
+        flushed before blocking again, so the files stay current for tailing.
+        A ``None`` item stops the thread after the lines before it.
+        """
+        handles: Dict[Path, Any] = {}
+        stop = False
+        while not stop:
+            batch = [self._timeline_queue.get()]
+            while len(batch) < TIMELINE_WRITE_BATCH:
+                try:
+                    batch.append(self._timeline_queue.get_nowait())
+                except queue.Empty:
+                    break
+            lines_by_path: Dict[Path, List[bytes]] = {}
+            for item in batch:
+                if item is None:
+                    stop = True
+                    break
+                lines_by_path.setdefault(item[0], []).append(item[1])
+            for path, lines in lines_by_path.items():
+                try:
+                    handle = handles.get(path)
+                    if handle is None:
+                        handle = handles[path] = open(path, "ab")
+                    handle.write(b"".join(lines))
+                    handle.flush()
+                except Exception as e:
+                    print(f"[auto_responder] Failed to write timeline {path}: {e}")
+        for handle in handles.values():
+            handle.close()
+
+    def _stop_timeline_writer(self) -> None:
+        self._timeline_queue.put(None)
+        self._timeline_thread.join(timeout=5)
 
     def get_machine_output_dir(self, machine_name: str) -> Path:
         output_dir = Path("/outputs") / RUN_ID / "defender" / machine_name
@@ -189,10 +565,10 @@ class AutoResponder:
 
         if api_path.exists():
             try:
-                existing = json.loads(api_path.read_text(encoding="utf-8"))
+                existing = _json_loads(api_path.read_bytes())
                 if isinstance(existing, dict):
                     state.update(existing)
-            except (json.JSONDecodeError, OSError, ValueError):
+            except (OSError, ValueError):
                 pass
 
         sessions = state.get("sessions")
@@ -258,78 +634,146 @@ class AutoResponder:
 
     def load_processed_alerts(self) -> None:
         try:
+            now = datetime.now(timezone.utc)
             if PROCESSED_FILE.exists():
-                with PROCESSED_FILE.open("r") as f:
-                    data = json.load(f)
-                    self.processed_alerts = set(data.get("processed_hashes", []))
-                    threat_history_data = data.get("threat_history", {})
-                    now = datetime.now(timezone.utc)
-                    for threat_hash, timestamp_str in threat_history_data.items():
-                        try:
-                            threat_time = datetime.fromisoformat(timestamp_str)
-                            if (now - threat_time).total_seconds() < DUPLICATE_DETECTION_WINDOW:
-                                self.threat_history[threat_hash] = threat_time
-                        except (ValueError, TypeError):
-                            continue
+                data = _json_loads(PROCESSED_FILE.read_bytes())
+                self.processed_alerts = set(data.get("processed_hashes", []))
+                if data.get("hash_format") != PROCESSED_HASH_FORMAT:
+                    # Older snapshot: its hashes may be md5 keys, kept here
+                    # so those alerts are recognised instead of re-run
+                    self._legacy_processed = set(self.processed_alerts)
+                for threat_hash, timestamp_str in data.get("threat_history", {}).items():
+                    self._restore_threat(threat_hash, timestamp_str, now)
+            if PROCESSED_JOURNAL.exists():
+                # Entries appended since the snapshot was last compacted
+                for line in PROCESSED_JOURNAL.read_text().splitlines():
+                    kind, _, rest = line.partition(" ")
+                    if kind == "a":
+                        self.processed_alerts.add(rest)
+                    elif kind == "t":
+                        threat_hash, _, timestamp_str = rest.partition(" ")
+                        self._restore_threat(threat_hash, timestamp_str, now)
+                    self._journal_entries += 1
+            self._processed_bloom = _HashBloom.for_members(self.processed_alerts)
+            self.threat_history = OrderedDict(sorted(self.threat_history.items(), key=lambda item: item[1]))
+            if self.processed_alerts or self.threat_history:
                 print(f"[auto_responder] Loaded {len(self.processed_alerts)} processed alerts, {len(self.threat_history)} recent threats")
         except Exception as e:
             print(f"[auto_responder] Failed to load processed alerts: {e}")
             self.processed_alerts = set()
-            self.threat_history = {}
+            self._legacy_processed = set()
+            self.threat_history = OrderedDict()
+
+    def _restore_threat(self, threat_hash: str, timestamp_str: str, now: datetime) -> None:
+        try:
+            threat_time = datetime.fromisoformat(timestamp_str)
+            if (now - threat_time).total_seconds() < DUPLICATE_DETECTION_WINDOW:
+                self.threat_history[threat_hash] = threat_time
+        except (ValueError, TypeError):
+            return
+
+    def _expire_threats(self, now: datetime) -> None:
+        """Drop threats whose duplicate-detection window has passed."""
+        cutoff = now - timedelta(seconds=DUPLICATE_DETECTION_WINDOW)
+        while self.threat_history:
+            threat_hash, recorded = next(iter(self.threat_history.items()))
+            if recorded > cutoff:
+                break
+            del self.threat_history[threat_hash]
 
     def save_processed_alerts(self) -> None:
+        """Persist the alerts and threats recorded since the last save.
+
+        They are appended to PROCESSED_JOURNAL; the full PROCESSED_FILE
+        snapshot is only rewritten, and the journal emptied, once the journal
+        would reach PROCESSED_COMPACT_EVERY entries.
+        """
+        if not self._unsaved:
+            return
         try:
             PROCESSED_FILE.parent.mkdir(parents=True, exist_ok=True)
-            now = datetime.now(timezone.utc)
-            active_threats = {
-                threat_hash: threat_time.isoformat()
-                for threat_hash, threat_time in self.threat_history.items()
-                if (now - threat_time).total_seconds() < DUPLICATE_DETECTION_WINDOW
-            }
-            with PROCESSED_FILE.open("w") as f:
-                json.dump({
-                    "processed_hashes": list(self.processed_alerts),
-                    "threat_history": active_threats,
-                    "last_updated": datetime.now(timezone.utc).isoformat()
-                }, f, indent=2)
+            if self._journal_entries + len(self._unsaved) >= PROCESSED_COMPACT_EVERY:
+                self._write_processed_snapshot()
+                # Replaying a journal already in the snapshot is harmless, so
+                # a crash before this unlink loses nothing.
+                PROCESSED_JOURNAL.unlink(missing_ok=True)
+                self._journal_entries = 0
+            else:
+                with PROCESSED_JOURNAL.open("a") as f:
+                    f.write("".join(f"{entry}\n" for entry in self._unsaved))
+                self._journal_entries += len(self._unsaved)
+            self._unsaved.clear()
         except Exception as e:
             print(f"[auto_responder] Failed to save processed alerts: {e}")
 
-    def get_alert_hash(self, alert: Dict) -> str:
-        key_fields = {
-            "sourceip": alert.get("sourceip", ""),
-            "destip": alert.get("destip", ""),
-            "attackid": alert.get("attackid", ""),
-            "proto": alert.get("proto", ""),
-            "timestamp": alert.get("timestamp", "")
+    def _write_processed_snapshot(self) -> None:
+        now = datetime.now(timezone.utc)
+        self._expire_threats(now)
+        active_threats = {
+            threat_hash: threat_time.isoformat()
+            for threat_hash, threat_time in self.threat_history.items()
         }
-        alert_str = json.dumps(key_fields, sort_keys=True)
-        return hashlib.md5(alert_str.encode()).hexdigest()
+        # Written compactly to a temp file and renamed over the snapshot, so
+        # a crash mid-write never leaves a truncated processed_alerts.json.
+        tmp_path = PROCESSED_FILE.with_suffix(".json.tmp")
+        tmp_path.write_bytes(_json_dumps({
+            "hash_format": PROCESSED_HASH_FORMAT,
+            "processed_hashes": sorted(self.processed_alerts),
+            "threat_history": active_threats,
+            "last_updated": now.isoformat()
+        }))
+        os.replace(tmp_path, PROCESSED_FILE)
+
+    def is_processed(self, alert_hash: str) -> bool:
+        return alert_hash in self._processed_bloom and alert_hash in self.processed_alerts
+
+    def mark_processed(self, alert_hash: str) -> None:
+        self.processed_alerts.add(alert_hash)
+        if len(self.processed_alerts) > self._processed_bloom.capacity:
+            # Past capacity the false-positive rate climbs quickly; rebuild
+            # at twice the size rather than let the filter stop filtering
+            self._processed_bloom = _HashBloom.for_members(self.processed_alerts)
+        else:
+            self._processed_bloom.add(alert_hash)
+
+    def get_alert_hash(self, alert: Dict) -> str:
+        # Fixed field order and a separator that never occurs in alert
+        # fields give a stable key without building and JSON-encoding a dict.
+        alert_str = "\x1f".join([str(alert.get(field, "")) for field in ALERT_KEY_FIELDS])
+        # Pure dedup key: blake2b is several times faster than md5 here and
+        # a 16-byte digest keeps the 32-char hex form stored on disk.
+        return hashlib.blake2b(alert_str.encode(), digest_size=16).hexdigest()
+
+    def _migrate_legacy_hash(self, alert: Dict, alert_hash: str) -> bool:
+        """Re-key an alert processed under the old md5 hash; True if it was."""
+        legacy_key = json.dumps({field: alert.get(field, "") for field in ALERT_KEY_FIELDS}, sort_keys=True)
+        legacy_hash = hashlib.md5(legacy_key.encode()).hexdigest()
+        if legacy_hash not in self._legacy_processed:
+            return False
+        self._legacy_processed.discard(legacy_hash)
+        if not self.is_processed(alert_hash):
+            self.mark_processed(alert_hash)
+            self._unsaved.append(f"a {alert_hash}")
+        return True
 
     def get_threat_hash(self, alert: Dict) -> str:
-        import re
         source_ip = alert.get("sourceip", "")
         dest_ip = alert.get("destip", "")
         raw_alert = alert.get("raw", "")
 
         if not source_ip or not dest_ip:
-            src_match = re.search(r'Src IP\s+(\d+\.\d+\.\d+\.\d+)', raw_alert)
-            to_ip_match = re.search(r'to IP\s+(\d+\.\d+\.\d+\.\d+)', raw_alert)
-            to_match = re.search(r'to\s+(\d+\.\d+\.\d+\.\d+):\d+', raw_alert)
+            parsed = _parse_raw(raw_alert)
+            ip_match = parsed.ips
 
-            if src_match:
-                source_ip = src_match.group(1)
+            if parsed.src_ip:
+                source_ip = parsed.src_ip
             elif not source_ip:
-                ip_match = re.findall(r'(\d+\.\d+\.\d+\.\d+)', raw_alert)
                 if len(ip_match) >= 1:
                     source_ip = ip_match[0]
 
-            if to_ip_match:
-                dest_ip = to_ip_match.group(1)
-            elif to_match:
-                dest_ip = to_match.group(1)
+            if parsed.to_ip:
+                dest_ip = parsed.to_ip
             elif not dest_ip:
-                ip_match = re.findall(r'(\d+\.\d+\.\d+\.\d+)', raw_alert)
                 if len(ip_match) >= 2:
                     dest_ip = ip_match[-1] if ip_match[-1] != source_ip else ip_match[1]
 
@@ -342,130 +786,134 @@ class AutoResponder:
         raw_lower = raw_alert.lower()
 
         # 1. Try to extract the canonical "Detected <phrase>" from Slips
-        detected_match = re.search(r'detected\s+(.+?)(?:\.|threat level|$)', raw_lower)
+        detected_match = _DETECTED_RE.search(raw_lower)
         if detected_match:
             phrase = detected_match.group(1).strip()
             # Normalise: collapse whitespace, strip IPs/numbers so
             # "ICMP scan on 10 hosts" and "ICMP scan on 25 hosts" hash alike
-            phrase = re.sub(r'\d+\.\d+\.\d+\.\d+', '_IP_', phrase)
-            phrase = re.sub(r'\b\d+\b', '_N_', phrase)
-            phrase = re.sub(r'\s+', ' ', phrase).strip()
+            phrase = _IP_RE.sub('_IP_', phrase)
+            phrase = _NUMBER_RE.sub('_N_', phrase)
+            phrase = _SPACES_RE.sub(' ', phrase).strip()
             attack_type = phrase
 
         # 2. Fallback keyword mapping for alerts that lack "Detected ..."
         if attack_type == "unknown":
-            kw_map = [
-                ("horizontal port scan", "horizontal_port_scan"),
-                ("vertical port scan",   "vertical_port_scan"),
-                ("password guessing",    "password_guessing"),
-                ("brute force",          "brute_force"),
-                ("denial of service",    "dos"),
-                ("ddos",                 "dos"),
-                ("icmp.*scan",           "icmp_scan"),
-                ("port scan",            "port_scan"),
-                ("ssh",                  "ssh_attack"),
-            ]
-            for pattern, label in kw_map:
-                if re.search(pattern, raw_lower):
+            for pattern, label in _ATTACK_KEYWORDS:
+                if pattern.search(raw_lower):
                     attack_type = label
                     break
             else:
                 if alert.get("attackid"):
                     attack_type = alert.get("attackid", "unknown")
 
-        threat_fields = {
-            "source_ip": source_ip,
-            "dest_ip": dest_ip,
-            "attack_type": attack_type,
-        }
-        threat_str = json.dumps(threat_fields, sort_keys=True)
-        return hashlib.md5(threat_str.encode()).hexdigest()
+        # Same keying as get_alert_hash: joined fields, blake2b digest
+        threat_str = "\x1f".join((str(attack_type), str(dest_ip), str(source_ip)))
+        return hashlib.blake2b(threat_str.encode(), digest_size=16).hexdigest()
 
     def is_duplicate_threat(self, alert: Dict, alert_hash: str) -> bool:
-        """Pure read-only check: is this threat already being handled?
-        Does NOT mutate state — call record_threat() after successful processing."""
+        """Check whether this threat is already being handled.
+        Does NOT record it — call record_threat() after successful processing."""
         threat_hash = self.get_threat_hash(alert)
-        now = datetime.now(timezone.utc)
-
-        with self.lock:
-            if threat_hash in self.threat_history:
-                first_seen = self.threat_history[threat_hash]
-                time_since_first = (now - first_seen).total_seconds()
-                if time_since_first < DUPLICATE_DETECTION_WINDOW:
-                    return True
-                # Window expired — allow re-processing
-                return False
-            return False
+        # Expired entries are evicted first, so membership means the window
+        # is still open; an expired threat may be processed again
+        self._expire_threats(datetime.now(timezone.utc))
+        return threat_hash in self.threat_history
 
     def record_threat(self, alert: Dict) -> None:
         """Record a threat as actively being handled (call after successful process_alert)."""
         threat_hash = self.get_threat_hash(alert)
         now = datetime.now(timezone.utc)
-        with self.lock:
-            self.threat_history[threat_hash] = now
+        self.threat_history[threat_hash] = now
+        self.threat_history.move_to_end(threat_hash)
+        self._unsaved.append(f"t {threat_hash} {now.isoformat()}")
 
     def get_new_alerts(self) -> List[Dict]:
-        if not ALERT_FILE.exists():
+        """Return high-confidence alerts that have not been processed yet.
+
+        Only the bytes appended since the previous poll are parsed. Alerts
+        read earlier but not processed (failed, or held back as a duplicate
+        threat) stay in ``_pending_alerts`` and are returned again.
+        """
+        try:
+            st = ALERT_FILE.stat()
+        except OSError:
             return []
+        if st.st_ino != self._alert_inode:
+            # New file (first poll, or SLIPS recreated it): offsets into the
+            # old one mean nothing, even if the new file is already larger
+            self._alert_inode = st.st_ino
+            self._alert_offset = 0
+        # Unchanged size and mtime: nothing appended, skip opening the file
+        stat_key = (st.st_size, st.st_mtime_ns)
+        # Recorded only after a successful read, so a failed one is retried
+        if stat_key != self._alert_stat and self._read_appended_alerts():
+            self._alert_stat = stat_key
+
+        self._pending_alerts = {
+            alert_hash: alert
+            for alert_hash, alert in self._pending_alerts.items()
+            if not self.is_processed(alert_hash)
+        }
+        return list(self._pending_alerts.values())
 
-        new_alerts = []
+    def _read_appended_alerts(self) -> bool:
+        """Queue the high-confidence alerts appended since the last read; False if it failed."""
         try:
-            with ALERT_FILE.open("r") as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    try:
-                        alert = json.loads(line)
-                        if not self._is_high_confidence_alert(alert):
-                            continue
-                        alert_hash = self.get_alert_hash(alert)
-                        if alert_hash in self.processed_alerts:
-                            continue
-                        new_alerts.append(alert)
-                    except json.JSONDecodeError:
-                        continue
+            with ALERT_FILE.open("rb") as f:
+                if f.seek(0, os.SEEK_END) < self._alert_offset:
+                    # Truncated in place: read it again from the start
+                    self._alert_offset = 0
+                f.seek(self._alert_offset)
+                data = f.read()
         except Exception as e:
             print(f"[auto_responder] Error reading alerts file: {e}")
+            return False
 
-        return new_alerts
+        lines = data.split(b"\n")
+        consumed = len(data)
+        # A last line without its newline may still be being written; take
+        # it only if it already parses, otherwise re-read it next poll.
+        if lines[-1].strip():
+            try:
+                _json_loads(lines[-1])
+            except ValueError:
+                consumed -= len(lines.pop())
+        self._alert_offset += consumed
+
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                alert = _json_loads(line)
+            except ValueError:
+                continue
+            if not isinstance(alert, dict) or not self._is_high_confidence_alert(alert):
+                continue
+            alert_hash = self.get_alert_hash(alert)
+            if self._legacy_processed and self._migrate_legacy_hash(alert, alert_hash):
+                continue
+            self._pending_alerts.setdefault(alert_hash, alert)
+        # Every alert written before the restart has now been seen once;
+        # later alerts can only carry new-style hashes
+        self._legacy_processed.clear()
+        return True
 
     def _is_high_confidence_alert(self, alert: Dict) -> bool:
         note = alert.get("note", "").lower()
-        if note in ["heartbeat", "queued", "completed"]:
+        if note in {"heartbeat", "queued", "completed"}:
             return False
-        if len(alert.keys()) <= 3 and "note" in alert:
+        if len(alert) <= 3 and "note" in alert:
             return False
 
-        raw_alert = alert.get("raw", "").lower()
-        description = alert.get("description", "").lower()
-        threat_level = alert.get("threat_level", "").lower()
-        alert_text = f"{raw_alert} {description} {threat_level}"
-
-        high_confidence_patterns = [
-            "confidence: 1",
-            "confidence: 0.9",
-            "confidence: 0.8",
-            "confidence: 1.0",
-            "threat level: high",
-            "threat_level: high",
-            "high entropy",
-            "entropy: 5",  # DNS TXT with entropy >= 5 is suspicious
-            "vertical port scan",
-            "horizontal port scan",
-            "denial of service",
-            "ddos",
-            "brute force",
-            "password guessing"
-        ]
-
-        for pattern in high_confidence_patterns:
-            if pattern in alert_text:
+        # Most matches come from the SLIPS "raw" line, so check fields one at
+        # a time and only lowercase the next one when the previous missed.
+        for field in ("raw", "description", "threat_level"):
+            if _HIGH_CONFIDENCE_RE.search(alert.get(field, "").encode("utf-8", "replace").lower()):
                 return True
         return False
 
     def format_alert_for_planner(self, alert: Dict) -> str:
-        import re
         timestamp = alert.get("timestamp", datetime.now().isoformat())
         source_ip = alert.get("sourceip", "unknown")
         dest_ip = alert.get("destip", "unknown")
@@ -475,12 +923,11 @@ class AutoResponder:
 
         raw_alert = alert.get("raw", "")
         if raw_alert and (source_ip == "unknown" or dest_ip == "unknown"):
-            ip_match = re.findall(r'(\d+\.\d+\.\d+\.\d+)', raw_alert)
-            if len(ip_match) >= 2:
-                source_ip, dest_ip = ip_match[0], ip_match[1]
-            time_match = re.search(r'(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2})', raw_alert)
-            if time_match:
-                timestamp = time_match.group(1) + '+00:00'
+            parsed = _parse_raw(raw_alert)
+            if len(parsed.ips) >= 2:
+                source_ip, dest_ip = parsed.ips[0], parsed.ips[1]
+            if parsed.timestamp:
+                timestamp = parsed.timestamp + '+00:00'
             attack_id = "vertical_port_scan" if "vertical port scan" in raw_alert.lower() else "unknown"
             proto = "TCP" if "TCP" in raw_alert else "unknown"
             description = raw_alert
@@ -506,7 +953,7 @@ class AutoResponder:
 
         for attempt in range(1, max_attempts + 1):
             try:
-                response = requests.post(PLANNER_URL, json=payload, timeout=PLANNER_REQUEST_TIMEOUT)
+                response = self._http.post(PLANNER_URL, json=payload, timeout=PLANNER_REQUEST_TIMEOUT)
                 response.raise_for_status()
                 result = response.json()
                 print(f"[PLANNER_RESPONSE_RECEIVED]", flush=True)
@@ -538,12 +985,7 @@ class AutoResponder:
         return None
 
     def determine_target_info(self, executor_ip: str) -> Optional[tuple]:
-        if executor_ip.startswith("172.31.0."):
-            return OPENCODE_SERVER_HOST, "server"
-        elif executor_ip.startswith("172.30.0."):
-            return OPENCODE_COMPROMISED_HOST, "compromised"
-        else:
-            return OPENCODE_SERVER_HOST, "server"
+        return TARGETS_BY_SUBNET.get(executor_ip.rsplit(".", 1)[0], TARGETS_BY_SUBNET["172.31.0"])
 
     # ──────────────────────────────────────────────────────────────────
     # OpenCode Server API methods
@@ -553,7 +995,7 @@ class AutoResponder:
         """Check if OpenCode server is healthy on target."""
         base_url = self.get_opencode_base_url(target_ip)
         try:
-            resp = requests.get(f"{base_url}/global/health", timeout=5)
+            resp = self._http.get(f"{base_url}/global/health", timeout=5)
             if resp.status_code == 200:
                 data = resp.json()
                 return data.get("healthy", False)
@@ -577,7 +1019,7 @@ class AutoResponder:
             body = {}
             if title:
                 body["title"] = title
-            resp = requests.post(f"{base_url}/session", json=body, timeout=10)
+            resp = self._http.post(f"{base_url}/session", json=body, timeout=10)
             resp.raise_for_status()
             session = resp.json()
             session_id = session.get("id")
@@ -594,7 +1036,7 @@ class AutoResponder:
                 "parts": [{"type": "text", "text": message}],
                 "agent": agent,
             }
-            resp = requests.post(
+            resp = self._http.post(
                 f"{base_url}/session/{session_id}/prompt_async",
                 json=body,
                 timeout=30
@@ -612,7 +1054,7 @@ class AutoResponder:
                 "parts": [{"type": "text", "text": message}],
                 "agent": agent,
             }
-            resp = requests.post(
+            resp = self._http.post(
                 f"{base_url}/session/{session_id}/message",
                 json=body,
                 timeout=OPENCODE_TIMEOUT
@@ -627,7 +1069,7 @@ class AutoResponder:
         """Get session status using GET /session/status."""
         base_url = self.get_opencode_base_url(target_ip)
         try:
-            resp = requests.get(f"{base_url}/session/status", timeout=10)
+            resp = self._http.get(f"{base_url}/session/status", timeout=10)
             resp.raise_for_status()
             all_statuses = resp.json()
             if session_id:
@@ -644,7 +1086,7 @@ class AutoResponder:
         last_error = None
         for attempt in range(3):
             try:
-                resp = requests.get(f"{base_url}/session/{session_id}/message", timeout=30)
+                resp = self._http.get(f"{base_url}/session/{session_id}/message", timeout=30)
                 resp.raise_for_status()
                 return resp.json()
             except Exception as e:
@@ -698,18 +1140,18 @@ class AutoResponder:
 
             self.log("POLL", f"Session {session_id[:8]} status: {status_str} ({elapsed:.0f}s)", machine_name)
 
-            if any(ind in status_str for ind in ["completed", "idle", "ready", "done"]):
+            if _SESSION_DONE_RE.search(status_str):
                 return True
-            if "error" in status_str or "failed" in status_str:
+            if _SESSION_ERROR_RE.search(status_str):
                 self.log("ERROR", f"Session {session_id[:8]} reported error: {status_str}", machine_name)
                 return True
 
-            if not any(ind in status_str for ind in ["busy", "pending", "running", "active", "generating"]):
+            if not _SESSION_BUSY_RE.search(status_str):
                 time.sleep(OPENCODE_STATUS_POLL_INTERVAL)
                 status2 = self.get_session_status(target_ip, session_id)
                 if status2 is not None:
                     status2_str = str(status2).lower()
-                    if not any(ind in status2_str for ind in ["busy", "pending", "running", "active", "generating"]):
+                    if not _SESSION_BUSY_RE.search(status2_str):
                         self.log("POLL", f"Session {session_id[:8]} appears idle (confirmed)", machine_name)
                         return True
 
@@ -721,7 +1163,7 @@ class AutoResponder:
     def abort_session(self, target_ip: str, session_id: str) -> bool:
         base_url = self.get_opencode_base_url(target_ip)
         try:
-            resp = requests.post(f"{base_url}/session/{session_id}/abort", timeout=10)
+            resp = self._http.post(f"{base_url}/session/{session_id}/abort", timeout=10)
             return resp.status_code == 200
         except Exception:
             return False
@@ -756,7 +1198,9 @@ class AutoResponder:
         try:
             # Set a shorter timeout for SSE since it's best-effort
             sse_timeout = min(timeout, 120)  # Max 2 minutes for SSE
-            with requests.get(f"{base_url}/event", stream=True, timeout=sse_timeout) as resp:
+            with self._http.get(f"{base_url}/event", stream=True, timeout=sse_timeout) as resp, \
+                    contextlib.ExitStack() as stack:
+                sse_log = None
                 resp.raise_for_status()
 
                 for line in resp.iter_lines(decode_unicode=True):
@@ -773,7 +1217,7 @@ class AutoResponder:
                     if line.startswith("data: "):
                         try:
                             json_str = line[6:]  # Remove "data: " prefix
-                            event = json.loads(json_str)
+                            event = _json_loads(json_str)
 
                             # Filter events for this session
                             # Session ID can be at top level or nested in info
@@ -784,12 +1228,14 @@ class AutoResponder:
                             if event_session_id == session_id:
                                 events.append(event)
 
-                                # Write immediately to log file
-                                with open(sse_log_path, "a", encoding="utf-8") as f:
-                                    f.write(json.dumps(event, separators=(",", ":")) + "\n")
-                                    f.flush()
+                                # Write immediately to log file, opened once
+                                # on the first matching event
+                                if sse_log is None:
+                                    sse_log = stack.enter_context(open(sse_log_path, "ab"))
+                                sse_log.write(_json_dumps(event) + b"\n")
+                                sse_log.flush()
 
-                        except (json.JSONDecodeError, ValueError):
+                        except ValueError:
                             # Skip malformed JSON
                             continue
 
@@ -879,24 +1325,29 @@ class AutoResponder:
                  machine_name, alert_hash, execution_id)
 
         # ── Also write each event to the timeline ──
+        # Hundreds of events per execution: encode them all and hand the
+        # writer thread one blob instead of a line (or an open()) per event.
         timeline_path = self.get_machine_timeline_path(machine_name)
+        timeline_ts = datetime.now(timezone.utc).isoformat()
+        timeline_lines = []
         for line in legacy_lines:
             try:
-                event = json.loads(line)
+                event = _json_loads(line)
                 event_type = event.get("type", "")
                 timeline_entry = {
-                    "ts": datetime.now(timezone.utc).isoformat(),
+                    "ts": timeline_ts,
                     "level": "OPENCODE",
                     "msg": event_type,
                 }
                 if execution_id:
                     timeline_entry["exec"] = execution_id[:8]
                 timeline_entry["data"] = event
-                with open(timeline_path, "a", encoding="utf-8") as handle:
-                    handle.write(json.dumps(timeline_entry, separators=(",", ":")) + "\n")
-                    handle.flush()
-            except (json.JSONDecodeError, ValueError):
+                timeline_lines.append(_json_dumps(timeline_entry))
+            except (TypeError, ValueError, AttributeError):
                 continue
+        if timeline_lines:
+            timeline_lines.append(b"")
+            self._timeline_queue.put((timeline_path, b"\n".join(timeline_lines)))
 
         # ── Parse metrics from messages ──
         llm_calls = 0
@@ -957,6 +1408,16 @@ class AutoResponder:
         if not execution_id:
             execution_id = hashlib.md5(f"{time.time()}".encode()).hexdigest()[:16]
 
+        # Identical for every attempt, so it is built once
+        context = REMEDIATION_PROMPT_TEMPLATE.format(
+            plan=plan,
+            source_ip=alert.get('sourceip', 'unknown'),
+            dest_ip=alert.get('destip', 'unknown'),
+            attack_id=alert.get('attackid', 'unknown'),
+            target_name=target_name,
+            target_ip=target_ip,
+        )
+
         # Retry loop for model availability errors
         for attempt, delay in enumerate([0] + RETRY_DELAYS):
             if attempt > 0:
@@ -973,40 +1434,6 @@ class AutoResponder:
 
             self.log("API", f"✓ OpenCode server healthy on {target_name}", target_name, alert_hash, execution_id)
 
-            context = f"""Execute this security remediation plan immediately:
-
-PLAN: {plan}
-
-CONTEXT:
-- Alert Source IP: {alert.get('sourceip', 'unknown')}
-- Alert Target IP: {alert.get('destip', 'unknown')}
-- Attack Type: {alert.get('attackid', 'unknown')}
-- Target Machine: {target_name} ({target_ip})
-- Target IP: {target_ip}
-
-**ABSOLUTE PROHIBITIONS - DO NOT VIOLATE:**
-- **NEVER STOP OR RESTART SSH SERVICE**
-- **NEVER STOP OR RESTART HTTP/HTTPS SERVICES**
-- **NEVER KILL THE OPENCODE PROCESS** - Do NOT run: kill, pkill, or killall against the 'opencode' process. It is the agent controlling you.
-- **NEVER BLOCK PORT 4096/tcp** - This is the OpenCode server API port. Blocking it will terminate your own execution.
-- **NEVER BLOCK TRAFFIC TO/FROM YOUR OWN IP ADDRESS**
-- **NEVER DELETE OR MODIFY CRITICAL SYSTEM FILES** - Preserve monitoring and logging files:
-  - /tmp/system_monitor.sh
-  - /tmp/flask_attack_log.txt
-  - /tmp/flask_attack_summary.json
-  - /tmp/flask_login_attempts.jsonl
-  - /tmp/flask_bruteforce/monitoring.json
-  These files are essential for security forensics and incident analysis.
-
-**CRITICAL FIREWALL RULES - FOLLOW EXACTLY:**
-- **Maintain SSH (port 22), HTTPS (port 443), and OpenCode (port 4096) connectivity above all else**
-- **INPUT chain:** Use to block traffic FROM specific source IPs - SAFE
-- **OUTPUT chain:** Use to block traffic TO specific destination IPs - SAFE if NOT your own IP
-- **NEVER use 0.0.0.0/0 as destination**
-- **FORBIDDEN:** iptables -A INPUT -p tcp --dport 4096 -j DROP (blocks OpenCode API - kills your agent)
-
-Execute all containment and remediation steps immediately. Be decisive and thorough. After containment and remediation, take at least 1 extra creative step, it can be deception, counter attacking, etc. Basic containment is not enough."""
-
             machine_output_dir = self.get_machine_output_dir(target_name)
             stdout_path = machine_output_dir / "opencode_stdout.jsonl"  # legacy JSONL
             stderr_path = machine_output_dir / "opencode_stderr.log"
@@ -1185,8 +1612,6 @@ Execute all containment and remediation steps immediately. Be decisive and thoro
 
         In PLANNER_ONLY mode, logs plans without executing via OpenCode.
         """
-        import concurrent.futures
-
         # Planner-only mode: log plans and skip OpenCode execution
         if PLANNER_ONLY:
             for i, plan_data in enumerate(plans_list):
@@ -1228,27 +1653,21 @@ Execute all containment and remediation steps immediately. Be decisive and thoro
 
             self.execute_plan_via_server_api(plan, target_name, target_ip, alert, alert_hash, ip_execution_id)
 
-        # Do NOT use 'with' — that blocks until all futures complete.
-        # Fire-and-forget: create executor, submit tasks, let threads run in background.
-        pool = concurrent.futures.ThreadPoolExecutor(max_workers=len(plans_list))
-        futures = []
+        def report_failure(future: concurrent.futures.Future, executor_ip: str) -> None:
+            exc = future.exception()
+            if exc is not None:
+                self.log("ERROR", f"Plan execution for {executor_ip} failed: {exc}",
+                         alert_hash=alert_hash, execution_id=base_execution_id)
+
+        # Fire-and-forget on the long-lived pool; the alert loop moves on
         for i, plan_data in enumerate(plans_list):
-            futures.append(pool.submit(execute_single_plan, plan_data, i))
-        # Keep references alive so threads aren't garbage-collected;
-        # prune completed pools to avoid memory leak.
-        if not hasattr(self, '_background_pools'):
-            self._background_pools = []
-        self._background_pools = [
-            (p, futs) for p, futs in self._background_pools
-            if not all(fut.done() for fut in futs)
-        ]
-        self._background_pools.append((pool, futures))
-        pool.shutdown(wait=False)
+            future = self._exec_pool.submit(execute_single_plan, plan_data, i)
+            future.add_done_callback(
+                functools.partial(report_failure, executor_ip=plan_data.get("executor_host_ip", ""))
+            )
 
     def process_alert(self, alert: Dict) -> bool:
         """Process single alert through plan generation and execution."""
-        import re
-
         alert_hash = self.get_alert_hash(alert)
         base_execution_id = hashlib.md5(f"{alert_hash}{time.time()}".encode()).hexdigest()[:16]
         start_time = time.time()
@@ -1258,23 +1677,18 @@ Execute all containment and remediation steps immediately. Be decisive and thoro
         raw_alert = alert.get('raw', '')
 
         if source_ip == 'unknown' or dest_ip == 'unknown':
-            src_match = re.search(r'Src IP\s+(\d+\.\d+\.\d+\.\d+)', raw_alert)
-            to_ip_match = re.search(r'to IP\s+(\d+\.\d+\.\d+\.\d+)', raw_alert)
-            to_match = re.search(r'to\s+(\d+\.\d+\.\d+\.\d+):\d+', raw_alert)
+            parsed = _parse_raw(raw_alert)
+            ip_match = parsed.ips
 
-            if src_match:
-                source_ip = src_match.group(1)
+            if parsed.src_ip:
+                source_ip = parsed.src_ip
             elif source_ip == 'unknown':
-                ip_match = re.findall(r'(\d+\.\d+\.\d+\.\d+)', raw_alert)
                 if len(ip_match) >= 1:
                     source_ip = ip_match[0]
 
-            if to_ip_match:
-                dest_ip = to_ip_match.group(1)
-            elif to_match:
-                dest_ip = to_match.group(1)
+            if parsed.to_ip:
+                dest_ip = parsed.to_ip
             elif dest_ip == 'unknown':
-                ip_match = re.findall(r'(\d+\.\d+\.\d+\.\d+)', raw_alert)
                 if len(ip_match) >= 2:
                     unique_ips = list(dict.fromkeys(ip_match))
                     if len(unique_ips) >= 2:
@@ -1287,7 +1701,7 @@ Execute all containment and remediation steps immediately. Be decisive and thoro
             "source_ip": source_ip,
             "dest_ip": dest_ip,
             "attack_type": alert.get('attackid', 'unknown'),
-            "raw": raw_alert,
+            # full_alert already carries the raw SLIPS line
             "full_alert": alert
         })
 
@@ -1318,7 +1732,7 @@ Execute all containment and remediation steps immediately. Be decisive and thoro
                 "num_plans": len(plans_list),
                 "plans": plans_list,
                 "model": plan_response.get("model", "unknown"),
-                "formatted_alert": alert_text
+                "formatted_alert_len": len(alert_text)
             })
 
             exec_start = time.time()
@@ -1362,8 +1776,8 @@ Execute all containment and remediation steps immediately. Be decisive and thoro
                 try:
                     success = self.process_alert(alert)
                     if success:
-                        with self.lock:
-                            self.processed_alerts.add(alert_hash)
+                        self.mark_processed(alert_hash)
+                        self._unsaved.append(f"a {alert_hash}")
                         self.record_threat(alert)
                         processed_count += 1
                     else:
@@ -1383,10 +1797,14 @@ Execute all containment and remediation steps immediately. Be decisive and thoro
         print(f"[auto_responder] Monitoring {ALERT_FILE} (poll: {POLL_INTERVAL}s)")
         print(f"[auto_responder] Using OpenCode Server API mode")
 
+        watcher = None
         while True:
             try:
                 self.run_once()
-                time.sleep(POLL_INTERVAL)
+                # Retried until the slips output directory exists
+                if watcher is None or not watcher.active:
+                    watcher = _DirWatcher(ALERT_FILE)
+                watcher.wait(POLL_INTERVAL)
             except KeyboardInterrupt:
                 print(f"[auto_responder] Shutting down...")
                 break
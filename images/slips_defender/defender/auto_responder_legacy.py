@@ -3,8 +3,11 @@
 Simplified Auto Responder with One-line SSH Execution
 """
 
+import concurrent.futures
 import json
 import os
+import socket
+import subprocess
 import time
 import threading
 import hashlib
@@ -22,11 +25,47 @@ PLANNER_URL = os.getenv("PLANNER_URL", "http://127.0.0.1:8001/plan")
 OPENCODE_TIMEOUT = int(os.getenv("OPENCODE_TIMEOUT", "300"))
 POLL_INTERVAL = float(os.getenv("AUTO_RESPONDER_INTERVAL", "5"))
 MAX_EXECUTION_RETRIES = int(os.getenv("MAX_EXECUTION_RETRIES", "3"))
+# Alerts from one poll are planned and executed concurrently, up to this many
+MAX_CONCURRENT_ALERTS = max(1, int(os.getenv("AUTO_RESPONDER_CONCURRENCY", "4")))
+SSH_KEY = "/root/.ssh/id_rsa_auto"
+
+# Constant parts of the SSH command, built once at import; only the target
+# host is added per execution. The first
+# connection to a host becomes a ControlMaster that later runs multiplex
+# over, so only it pays for the TCP handshake, key exchange and auth.
+_SSH_BASE = [
+    "ssh", "-i", SSH_KEY, "-o", "StrictHostKeyChecking=no",
+    "-o", "ControlMaster=auto",
+    "-o", "ControlPath=/tmp/ar-ssh-%r@%h:%p",
+    "-o", "ControlPersist=600",
+]
+# The plan context arrives on stdin, so it never has to be quoted into the
+# remote command line or fit within its length limit
+_OPENCODE_RUN = 'opencode run --agent soc_god "$(cat)"'
+# Hosts whose ControlMaster is opened at startup
+_SSH_PREWARM_HOSTS = ("172.31.0.10", "172.30.0.10")
+
+def ssh_reachable(host: str, port: int = 22, timeout: float = 2.0) -> bool:
+    """Check that ``host`` answers on ``port`` with an SSH banner.
+
+    One TCP connect and read, instead of forking ping and a test ssh; an
+    unreachable target fails within ``timeout`` rather than ssh's own.
+    """
+    try:
+        with socket.create_connection((host, port), timeout=timeout) as sock:
+            return sock.recv(64).startswith(b"SSH-")
+    except OSError:
+        return False
+
 
 class AutoResponder:
     def __init__(self):
         self.processed_alerts: Set[str] = set()
         self.lock = threading.Lock()
+        # Reused by every poll; run_once waits for its own alerts' futures
+        self._alert_pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=MAX_CONCURRENT_ALERTS, thread_name_prefix="alert"
+        )
         self.setup_logging()
         self.load_processed_alerts()
         self.log("SYSTEM", "AutoResponder initialized")
@@ -113,32 +152,29 @@ class AutoResponder:
         # Create key for this alert combination
         repeat_key = f"{source_ip}->{dest_ip}->{attack_id}"
 
-        # Check if we've seen this combination recently
-        if repeat_key in self.processed_alerts:
-            return False
+        with self.lock:
+            # Check if we've seen this combination recently
+            if repeat_key in self.processed_alerts:
+                return False
 
-        # Mark this combination as seen
-        self.processed_alerts.add(repeat_key)
+            # Mark this combination as seen
+            self.processed_alerts.add(repeat_key)
 
-        # Clean up old entries (keep only last 100)
-        if len(self.processed_alerts) > 100:
-            # Convert to list, sort by recency (using timestamp), keep latest 100
-            all_entries = sorted(self.processed_alerts, reverse=True)[:100]
-            self.processed_alerts = set(all_entries)
+            # Clean up old entries (keep only last 100)
+            if len(self.processed_alerts) > 100:
+                # Convert to list, sort by recency (using timestamp), keep latest 100
+                all_entries = sorted(self.processed_alerts, reverse=True)[:100]
+                self.processed_alerts = set(all_entries)
 
         return False
 
     def get_alert_hash(self, alert: Dict) -> str:
         """Generate hash for alert deduplication"""
-        key_fields = {
-            "sourceip": alert.get("sourceip", ""),
-            "destip": alert.get("destip", ""),
-            "attackid": alert.get("attackid", ""),
-            "proto": alert.get("proto", ""),
-            "timestamp": alert.get("timestamp", "")
-        }
-        alert_str = json.dumps(key_fields, sort_keys=True)
-        return hashlib.md5(alert_str.encode()).hexdigest()
+        alert_str = "\x1f".join([
+            str(alert.get(field, ""))
+            for field in ("attackid", "destip", "proto", "sourceip", "timestamp")
+        ])
+        return hashlib.blake2b(alert_str.encode(), digest_size=16).hexdigest()
 
     def get_new_alerts(self) -> List[Dict]:
         """Get unprocessed alerts"""
@@ -203,6 +239,10 @@ class AutoResponder:
 
         self.log("EXECUTION", f"🎯 Target: {target_container} ({target_ip})", alert_hash, execution_id)
 
+        if not ssh_reachable(target_ip):
+            self.log("ERROR", f"❌ SSH not reachable on {target_container} ({target_ip})", alert_hash, execution_id)
+            return False
+
         # Simple context for OpenCode
         context = f"Execute security plan: {plan} | Alert: {alert.get('attackid', 'unknown')} from {alert.get('sourceip', 'unknown')}"
 
@@ -210,10 +250,9 @@ class AutoResponder:
             start_time = time.time()
             self.log("EXECUTION", f"🚀 Running OpenCode via SSH", alert_hash, execution_id)
 
-            # One-line SSH command
-            cmd = f'ssh -i /root/.ssh/id_rsa_auto -o StrictHostKeyChecking=no root@{target_ip} "opencode run --agent soc_god \\"{context}\\""'
+            cmd = _SSH_BASE + [f"root@{target_ip}", _OPENCODE_RUN]
 
-            result = subprocess.run(cmd, shell=True, capture_output=True, text=True, timeout=60)
+            result = subprocess.run(cmd, input=context, capture_output=True, text=True, timeout=60)
 
             duration = time.time() - start_time
 
@@ -309,11 +348,14 @@ class AutoResponder:
 
             self.log("INFO", f"📡 Processing {len(new_alerts)} new alerts")
 
-            for alert in new_alerts:
+            # Each alert blocks on the planner and then on ssh for up to a
+            # minute; running them side by side makes a burst of K alerts
+            # take about as long as the slowest one instead of all K.
+            futures = [(alert, self._alert_pool.submit(self.process_alert, alert)) for alert in new_alerts]
+            for alert, future in futures:
                 alert_hash = self.get_alert_hash(alert)
                 try:
-                    success = self.process_alert(alert)
-                    if success:
+                    if future.result():
                         with self.lock:
                             self.processed_alerts.add(alert_hash)
                 except Exception as e:
@@ -325,8 +367,33 @@ class AutoResponder:
         except Exception as e:
             self.log("ERROR", f"💥 Run error: {e}")
 
+    def prewarm_ssh_masters(self):
+        """Open a ControlMaster to each target in the background.
+
+        Best effort: a host that is down or refuses the key is logged and
+        left to the first execution, which opens its own master as before.
+        """
+        def warm(host: str):
+            cmd = _SSH_BASE + ["-o", "BatchMode=yes", "-o", "ConnectTimeout=5", "-fN", f"root@{host}"]
+            try:
+                # The backgrounded master inherits our stdio, so nothing is
+                # piped; a pipe would stay open for as long as the master lives
+                result = subprocess.run(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                        stderr=subprocess.DEVNULL, timeout=15)
+            except (OSError, subprocess.TimeoutExpired) as e:
+                self.log("WARNING", f"⚠️ SSH pre-warm for {host} failed: {e}")
+                return
+            if result.returncode == 0:
+                self.log("SYSTEM", f"🔗 SSH master ready for {host}")
+            else:
+                self.log("WARNING", f"⚠️ SSH pre-warm for {host} failed (exit {result.returncode})")
+
+        for host in _SSH_PREWARM_HOSTS:
+            threading.Thread(target=warm, args=(host,), name=f"ssh-prewarm-{host}", daemon=True).start()
+
     def run(self):
         """Main monitoring loop"""
+        self.prewarm_ssh_masters()
         self.log("SYSTEM", "🚀 Starting automated response service")
         self.log("SYSTEM", f"📡 Monitoring: {ALERT_FILE}")
         self.log("SYSTEM", f"🧠 Planner URL: {PLANNER_URL}")
@@ -344,6 +411,5 @@ class AutoResponder:
                 time.sleep(POLL_INTERVAL)
 
 if __name__ == "__main__":
-    import subprocess
     responder = AutoResponder()
     responder.run()
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
+import asyncio
+import itertools
 import json
 import os
 import re
 import threading
 import time
 import uuid
+from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import Dict, Any, Optional, List
 from fastapi import FastAPI, HTTPException
@@ -13,6 +16,22 @@ from pydantic import BaseModel, Field
 import httpx
 import logging
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    # orjson.JSONDecodeError subclasses json.JSONDecodeError, so existing
+    # ``except json.JSONDecodeError`` handlers keep working.
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+else:
+    _json_loads = json.loads
+
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
 logger = logging.getLogger(__name__)
 
 # Configuration
@@ -26,8 +45,95 @@ LLM_BASE_URL = os.getenv("LLM_BASE_URL", os.getenv("LLM_URL", "https://llm.ai.e-
 LLM_API_KEY = os.getenv("LLM_API_KEY", os.getenv("OPENCODE_API_KEY", ""))
 PLANNER_MODEL = os.getenv("PLANNER_MODEL", "gpt-4o")
 LLM_TIMEOUT = int(os.getenv("LLM_TIMEOUT", "60"))
+# Ask the endpoint for JSON-only output (OpenAI-compatible response_format);
+# set LLM_JSON_MODE=0 for backends that reject the parameter.
+LLM_JSON_MODE = os.getenv("LLM_JSON_MODE", "1") != "0"
+# Completion budget per host plan; the plan is five short prose fields.
+PLAN_MAX_TOKENS = int(os.getenv("PLAN_MAX_TOKENS", "2048"))
+# Transient failures (connection errors, 429/5xx) are retried with
+# exponential backoff; after LLM_BREAKER_THRESHOLD consecutive failed calls
+# the endpoint is considered down and requests fail fast for
+# LLM_BREAKER_COOLDOWN seconds instead of each waiting out LLM_TIMEOUT.
+LLM_RETRIES = int(os.getenv("LLM_RETRIES", "2"))
+LLM_RETRY_BACKOFF = float(os.getenv("LLM_RETRY_BACKOFF", "0.5"))
+LLM_BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", "3"))
+LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", "60"))
+_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# One pooled client for every LLM request: keeps the TCP/TLS connection to
+# the LLM endpoint alive across plans instead of re-handshaking per call.
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=LLM_TIMEOUT,
+            limits=httpx.Limits(max_keepalive_connections=16),
+        )
+    return _http_client
+
 
-app = FastAPI()
+_llm_consecutive_failures = 0
+_llm_breaker_open_until = 0.0
+
+
+def _record_llm_result(ok: bool) -> None:
+    """Update the circuit breaker after an LLM call."""
+    global _llm_consecutive_failures, _llm_breaker_open_until
+    if ok:
+        _llm_consecutive_failures = 0
+        return
+    _llm_consecutive_failures += 1
+    if _llm_consecutive_failures >= LLM_BREAKER_THRESHOLD:
+        _llm_breaker_open_until = time.monotonic() + LLM_BREAKER_COOLDOWN
+        logger.warning(
+            f"LLM endpoint failed {_llm_consecutive_failures} times in a row; "
+            f"failing fast for {LLM_BREAKER_COOLDOWN:.0f}s"
+        )
+
+
+async def _post_chat(body: bytes) -> httpx.Response:
+    """POST to the chat-completions endpoint, retrying transient failures.
+
+    Timeouts are not retried: each one already cost LLM_TIMEOUT seconds.
+    """
+    async def post() -> httpx.Response:
+        return await _get_http_client().post(
+            f"{LLM_BASE_URL}/chat/completions",
+            headers={
+                "Authorization": f"Bearer {LLM_API_KEY}",
+                "Content-Type": "application/json"
+            },
+            content=body
+        )
+
+    delay = LLM_RETRY_BACKOFF
+    for _ in range(LLM_RETRIES):
+        try:
+            response = await post()
+        except httpx.TimeoutException:
+            raise
+        except httpx.TransportError:
+            pass
+        else:
+            if response.status_code not in _RETRY_STATUSES:
+                return response
+        await asyncio.sleep(delay)
+        delay *= 2
+    # Final attempt: its response or error goes to the caller as-is
+    return await post()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    if _http_client is not None:
+        await _http_client.aclose()
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 class PlanRequest(BaseModel):
@@ -69,13 +175,8 @@ async def alerts(alert: Dict[str, object]) -> Dict[str, object]:
     return {"status": "stored", "run_id": RUN_ID}
 
 
-async def call_llm_for_plan(alert_text: str, executor_ip_hint: str) -> tuple[str, str]:
-    """
-    Call LLM API to generate incident response plan.
-    Returns (executor_ip, plan).
-    """
-    # Build the system prompt for security incident response
-    system_prompt = """You are an expert Security Operations Center (SOC) analyst and incident responder specializing in Linux system security, network forensics, and containment operations.
+# System prompt for security incident response (identical for every request)
+PLANNER_SYSTEM_PROMPT = """You are an expert Security Operations Center (SOC) analyst and incident responder specializing in Linux system security, network forensics, and containment operations.
 
 # Environment
 You are operating in a cybersecurity lab environment with Linux systems. Your SSH agent can execute commands on any host in the network.
@@ -116,63 +217,30 @@ Format:
 # Workflow Context
 Your incident response plan will drive the entire remediation process. The execution agent does not have access to the original alert and will rely solely on the information you provide. Ensure your analysis contains all relevant details from the alert needed to understand and resolve the incident."""
 
-    user_message = f"""# Security Alert
 
-{alert_text}
+# Shared by every request; only the user message is built per call
+_SYSTEM_MESSAGE = {"role": "system", "content": PLANNER_SYSTEM_PROMPT}
 
-# IMPORTANT - Execution Target
-You MUST generate this plan for execution on host: {executor_ip_hint}
 
-Generate an incident response plan in JSON format for the specified executor IP. Provide high-level strategic guidance without specific commands."""
+# Body of a leading ``` / ```json fence, up to the closing fence (or the end)
+_CODE_FENCE_RE = re.compile(r"```(?:json)?(.*?)(?:```|\Z)", re.DOTALL)
 
-    if not LLM_API_KEY:
-        raise HTTPException(
-            status_code=500,
-            detail="LLM API key not configured. Set OPENCODE_API_KEY environment variable."
-        )
+# Dotted-quad IPs in alert text
+_IPV4_RE = re.compile(r'(\d+\.\d+\.\d+\.\d+)')
 
-    # Make API call to LLM
-    try:
-        async with httpx.AsyncClient(timeout=LLM_TIMEOUT) as client:
-            response = await client.post(
-                f"{LLM_BASE_URL}/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {LLM_API_KEY}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": PLANNER_MODEL,
-                    "messages": [
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_message}
-                    ],
-                    "temperature": 0.3,
-                    "max_tokens": 4096
-                }
-            )
-            response.raise_for_status()
-            result = response.json()
-
-            # Extract the generated plan
-            plan_content = result["choices"][0]["message"]["content"]
-
-            # Try to parse as JSON
-            try:
-                # Strip markdown code blocks if present
-                plan_content = plan_content.strip()
-                if plan_content.startswith("```"):
-                    plan_content = plan_content.split("```")[1]
-                    if plan_content.startswith("json"):
-                        plan_content = plan_content[4:]
-                plan_content = plan_content.strip()
-
-                plan_json = json.loads(plan_content)
-
-                # Always use the hint if provided, to ensure per-IP planning
-                executor_ip = executor_ip_hint
-
-                # Build formatted plan from JSON
-                plan = f"""## Threat Analysis
+
+def _strip_code_fence(content: str) -> str:
+    """Remove a surrounding markdown code block (```json ... ```) if present."""
+    content = content.strip()
+    match = _CODE_FENCE_RE.match(content)
+    if match:
+        content = match.group(1)
+    return content.strip()
+
+
+def _format_plan(plan_json: Dict[str, Any]) -> str:
+    """Render the planner's JSON fields as the markdown plan sent to executors."""
+    return f"""## Threat Analysis
 {plan_json.get('threat_analysis', 'No analysis provided.')}
 
 ## Immediate Actions
@@ -187,26 +255,142 @@ Generate an incident response plan in JSON format for the specified executor IP.
 ## Validation Steps
 {plan_json.get('validation_steps', 'No validation steps provided.')}"""
 
-                return executor_ip, plan
 
-            except (json.JSONDecodeError, KeyError) as e:
-                # Fallback if JSON parsing fails
-                logger.warning(f"Failed to parse LLM response as JSON: {e}")
-                logger.warning(f"Response was: {plan_content[:500]}")
-                logger.warning(f"Using hint: {executor_ip_hint}")
-                return executor_ip_hint, plan_content
+async def _chat_completion(user_message: str, max_tokens: int) -> str:
+    """POST one chat-completion request and return the assistant content."""
+    if not LLM_API_KEY:
+        raise HTTPException(
+            status_code=500,
+            detail="LLM API key not configured. Set OPENCODE_API_KEY environment variable."
+        )
+
+    if time.monotonic() < _llm_breaker_open_until:
+        raise HTTPException(
+            status_code=503,
+            detail="LLM endpoint unavailable (circuit open); try again later"
+        )
+
+    try:
+        payload: Dict[str, Any] = {
+            "model": PLANNER_MODEL,
+            "messages": [_SYSTEM_MESSAGE, {"role": "user", "content": user_message}],
+            "temperature": 0.3,
+            "max_tokens": max_tokens
+        }
+        if LLM_JSON_MODE:
+            payload["response_format"] = {"type": "json_object"}
+
+        response = await _post_chat(_json_dumps(payload))
+        response.raise_for_status()
+        result = _json_loads(response.content)
+        content = result["choices"][0]["message"]["content"]
+        _record_llm_result(True)
+        return content
 
     except httpx.TimeoutException:
+        _record_llm_result(False)
         raise HTTPException(status_code=504, detail="LLM request timed out")
     except httpx.HTTPStatusError as e:
+        # Client errors (bad request, auth) say nothing about availability
+        status = e.response.status_code
+        _record_llm_result(status < 500 and status != 429)
         raise HTTPException(
             status_code=e.response.status_code,
             detail=f"LLM API error: {e.response.text}"
         )
     except Exception as e:
+        _record_llm_result(False)
         raise HTTPException(status_code=500, detail=f"Failed to generate plan: {str(e)}")
 
 
+async def call_llm_for_plan(alert_text: str, executor_ip_hint: str) -> tuple[str, str]:
+    """
+    Call LLM API to generate incident response plan.
+    Returns (executor_ip, plan).
+    """
+    user_message = f"""# Security Alert
+
+{alert_text}
+
+# IMPORTANT - Execution Target
+You MUST generate this plan for execution on host: {executor_ip_hint}
+
+Generate an incident response plan in JSON format for the specified executor IP. Provide high-level strategic guidance without specific commands."""
+
+    plan_content = await _chat_completion(user_message, max_tokens=PLAN_MAX_TOKENS)
+
+    # Try to parse as JSON
+    try:
+        plan_content = _strip_code_fence(plan_content)
+        plan_json = _json_loads(plan_content)
+
+        # Always use the hint if provided, to ensure per-IP planning
+        return executor_ip_hint, _format_plan(plan_json)
+
+    except (json.JSONDecodeError, KeyError, AttributeError) as e:
+        # Fallback if JSON parsing fails
+        logger.warning(f"Failed to parse LLM response as JSON: {e}")
+        logger.warning(f"Response was: {plan_content[:500]}")
+        logger.warning(f"Using hint: {executor_ip_hint}")
+        return executor_ip_hint, plan_content
+
+
+async def call_llm_for_plans(alert_text: str, executor_ips: List[str]) -> Dict[str, str]:
+    """
+    Generate plans for several executor hosts with a single LLM request.
+
+    The model is asked for a JSON object ``{"plans": [...]}`` holding one
+    plan object per host.  Returns ``{executor_ip: plan}`` for every host the
+    response covered; hosts that are missing (or an unparseable response)
+    are left out so the caller can fall back to ``call_llm_for_plan``.
+    Endpoint failures (timeouts, 5xx, 429) propagate instead.
+    """
+    targets = "\n".join(f"{i}. {ip}" for i, ip in enumerate(executor_ips, 1))
+    user_message = f"""# Security Alert
+
+{alert_text}
+
+# IMPORTANT - Execution Targets
+You MUST generate one separate plan for EACH of these {len(executor_ips)} hosts:
+{targets}
+
+Respond with a single JSON object of the form {{"plans": [<plan>, ...]}} containing exactly {len(executor_ips)} plans, one per host, in the order listed. Each <plan> uses the JSON format described above, with "executor_ip" set to its host. Provide high-level strategic guidance without specific commands."""
+
+    try:
+        content = await _chat_completion(user_message, max_tokens=PLAN_MAX_TOKENS * len(executor_ips))
+    except HTTPException as e:
+        # Timeouts, 5xx, rate limits and an open breaker would hit the
+        # per-IP requests too; only a rejected request is worth retrying
+        if e.status_code >= 500 or e.status_code == 429:
+            raise
+        logger.warning(f"Batched plan request failed ({e.detail}); planning per IP")
+        return {}
+
+    try:
+        parsed = _json_loads(_strip_code_fence(content))
+    except json.JSONDecodeError as e:
+        logger.warning(f"Failed to parse batched LLM response as JSON: {e}")
+        logger.warning(f"Response was: {content[:500]}")
+        return {}
+
+    items = parsed.get("plans") if isinstance(parsed, dict) else parsed
+    if not isinstance(items, list):
+        return {}
+
+    wanted = set(executor_ips)
+    plans: Dict[str, str] = {}
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            continue
+        ip = str(item.get("executor_ip", "")).strip()
+        if ip not in wanted and index < len(executor_ips):
+            # Model echoed a different/empty IP: trust the requested order
+            ip = executor_ips[index]
+        if ip in wanted and ip not in plans:
+            plans[ip] = _format_plan(item)
+    return plans
+
+
 @app.post("/plan", response_model=PlanResponse)
 async def plan(req: PlanRequest) -> Any:
     """Generate remediation plans for security alert using LLM - one plan per relevant IP"""
@@ -215,8 +399,9 @@ async def plan(req: PlanRequest) -> Any:
 
     alert_text = req.alert.strip()
 
-    # Extract IPs from alert text
-    ip_matches = re.findall(r'(\d+\.\d+\.\d+\.\d+)', alert_text)
+    # Source and target are the first two IPs in the alert text; stop
+    # scanning once both are found
+    ip_matches = [m.group(1) for m in itertools.islice(_IPV4_RE.finditer(alert_text), 2)]
 
     # Determine which IPs need plans
     # We want to generate plans for all relevant IPs in the alert
@@ -238,12 +423,24 @@ async def plan(req: PlanRequest) -> Any:
     if not relevant_ips:
         relevant_ips.append("172.31.0.10")
 
-    # Generate a plan for each relevant IP
-    plans = []
-    for target_ip in relevant_ips:
-        # Call LLM to generate plan for this specific IP
-        executor_ip, llm_plan = await call_llm_for_plan(alert_text, target_ip)
-        plans.append(SinglePlan(executor_host_ip=executor_ip, plan=llm_plan))
+    # Generate every per-IP plan in one LLM round trip; hosts the batched
+    # response did not cover get an individual request as before.
+    batched: Dict[str, str] = {}
+    if len(relevant_ips) > 1:
+        batched = await call_llm_for_plans(alert_text, relevant_ips)
+
+    # Per-IP requests are independent, so issue them concurrently
+    missing = [ip for ip in relevant_ips if ip not in batched]
+    fallback = await asyncio.gather(
+        *(call_llm_for_plan(alert_text, ip) for ip in missing)
+    )
+    planned = dict(batched)
+    planned.update(fallback)
+
+    plans = [
+        SinglePlan(executor_host_ip=ip, plan=planned[ip])
+        for ip in relevant_ips
+    ]
 
     return PlanResponse(
         plans=plans,
@@ -1,31 +1,66 @@
 #!/usr/bin/env python3
 import argparse
+import collections
 import json
 import os
+import queue
 import subprocess
 import selectors
+import signal
 import sys
+import threading
 import time
-from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 from uuid import uuid4
 
-# Add shared types path for imports
-SHARED_TYPES_PATH = Path(__file__).parent.parent / "images" / "shared" / "types.py"
-if SHARED_TYPES_PATH.exists():
-    import sys
-    sys.path.insert(0, str(SHARED_TYPES_PATH.parent))
-    from types import AgentMetrics, ensure_full_metrics
-    from opencode_utils import RETRY_DELAYS, ModelAvailabilityError, check_for_model_error
-else:
-    # Fallback if types.py not available
+# Add path to import shared modules
+_shared_paths = [
+    "/opt",  # Inside Docker container (shared is at /opt/shared/)
+    os.path.join(os.path.dirname(__file__), "..", "images"),  # Local development
+]
+for path in _shared_paths:
+    if os.path.exists(path) and path not in sys.path:
+        sys.path.insert(0, path)
+
+try:
+    from shared.timeline import append_timeline_entry, resolve_run_id, utc_timestamp
+except ImportError:
+    raise ImportError("shared.timeline module is required")
+
+try:
+    from shared.types import AgentMetrics, ensure_full_metrics
+    from shared.opencode_utils import RETRY_DELAYS, ModelAvailabilityError, check_for_model_error
+except ImportError:
+    # Fallback if shared types are not available
     AgentMetrics = Dict[str, Any]
     def ensure_full_metrics(m): return m  # type: ignore
     RETRY_DELAYS = [1, 5, 10]  # fallback
     ModelAvailabilityError = Exception  # type: ignore
     def check_for_model_error(messages): return None  # type: ignore
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    _json_loads = orjson.loads
+
+    def _json_dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+    def _json_dumps_indented(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+else:
+    _json_loads = json.loads
+
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+    def _json_dumps_indented(obj: Any) -> bytes:
+        return json.dumps(obj, indent=2).encode("utf-8")
+
 HAS_PEXPECT = False
 try:
     import pexpect
@@ -85,33 +120,147 @@ def parse_args() -> argparse.Namespace:
         default=int(os.environ.get("OPENCODE_TUI_IDLE_TIMEOUT", "10")),
         help="Seconds of idle output before assuming completion in TUI mode (default: 10).",
     )
+    parser.add_argument(
+        "--jsonl-messages",
+        action="store_true",
+        default=os.environ.get("OPENCODE_JSONL_MESSAGES", "") == "1",
+        help="While running, append API messages to opencode_api_messages.jsonl "
+        "instead of rewriting the whole JSON snapshot (default: off or OPENCODE_JSONL_MESSAGES=1).",
+    )
     return parser.parse_args()
 
 
-def resolve_run_id() -> str:
-    run_id = os.environ.get("RUN_ID", "").strip()
-    if run_id:
-        return run_id
-    current_run = os.path.join("outputs", ".current_run")
-    try:
-        with open(current_run, "r", encoding="utf-8") as handle:
-            return handle.read().strip()
-    except FileNotFoundError:
-        return "manual"
+def _writev_all(fd: int, buffers: List[bytes]) -> None:
+    """Write every buffer to *fd*, retrying after short ``os.writev`` writes."""
+    while buffers:
+        written = os.writev(fd, buffers)
+        done = 0
+        while done < len(buffers) and written >= len(buffers[done]):
+            written -= len(buffers[done])
+            done += 1
+        buffers = buffers[done:]
+        if buffers and written:
+            buffers[0] = buffers[0][written:]
+
+
+class BackgroundWriter:
+    """Write byte buffers to an unbuffered file object from a daemon thread.
+
+    The streaming loop only enqueues buffers, so reading the child's pipes
+    never waits on disk. The queue is bounded to apply back-pressure if the
+    disk falls far behind. Whatever has queued up since the last write is
+    pushed out with a single ``os.writev`` call (or one joined ``write``
+    where writev is unavailable), so data reaches the file as soon as the
+    thread gets to it without a syscall per record.
+    """
+
+    MAX_BATCH = 512  # stays below IOV_MAX (1024 on Linux)
+
+    def __init__(self, handle, maxsize: int = 1024) -> None:
+        self._handle = handle
+        self._queue: "queue.Queue[Optional[bytes]]" = queue.Queue(maxsize=maxsize)
+        self._error: Optional[OSError] = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        done = False
+        while not done:
+            batch: List[bytes] = []
+            item = self._queue.get()
+            while True:
+                if item is None:
+                    done = True
+                    break
+                batch.append(item)
+                if len(batch) >= self.MAX_BATCH:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    self._write_batch(batch)
+                except OSError as exc:
+                    # Keep draining so producers never block on a dead writer.
+                    self._error = exc
+
+    def _write_batch(self, batch: List[bytes]) -> None:
+        if hasattr(os, "writev"):
+            _writev_all(self._handle.fileno(), batch)
+        else:
+            self._handle.write(b"".join(batch))
 
+    def write(self, buf: bytes) -> None:
+        self._queue.put(buf)
 
-def write_timeline_entry(path: str, level: str, message: str, data: Optional[dict] = None) -> None:
-    entry = {
-        "ts": datetime.now(timezone.utc).isoformat(),
-        "level": level.upper(),
-        "msg": message,
-    }
-    if data:
-        entry["data"] = data
-    Path(path).parent.mkdir(parents=True, exist_ok=True)
-    with open(path, "a", encoding="utf-8") as handle:
-        handle.write(json.dumps(entry, separators=(",", ":")) + "\n")
-        handle.flush()
+    def close(self) -> None:
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._handle.close()
+        if self._error is not None:
+            print(f"[coder56_tui] WARNING: write to {getattr(self._handle, 'name', '?')} failed: {self._error}",
+                  file=sys.stderr)
+
+    def __enter__(self) -> "BackgroundWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+_TS_PREFIX = b'{"ts":"'
+_OPENCODE_MSG = b'","level":"OPENCODE","msg":'
+
+
+class TimelineWriter:
+    """Append JSONL timeline entries through a single long-lived file handle.
+
+    ``write_opencode_event`` is the fast path for per-event OPENCODE lines:
+    the constant parts of the record are precomputed bytes and the event's
+    original JSON line is embedded as-is, so nothing is re-encoded. The
+    actual disk writes happen on a ``BackgroundWriter`` thread.
+    """
+
+    def __init__(self, path: str, execution_id: str = "") -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._sink = BackgroundWriter(open(path, "ab", buffering=0))
+        self._exec_data = b',"exec":' + _json_dumps(execution_id[:8]) + b',"data":'
+
+    def write(self, entry: Dict[str, Any]) -> None:
+        self._sink.write(_json_dumps(entry) + b"\n")
+
+    def write_opencode_event(self, event_type: str, raw_event: bytes) -> None:
+        # One join builds the record in a single allocation; a shared scratch
+        # buffer cannot be reused here because the bytes are handed off to
+        # the writer thread.
+        self._sink.write(b"".join((
+            _TS_PREFIX, utc_timestamp().encode(), _OPENCODE_MSG,
+            _json_dumps(event_type), self._exec_data, raw_event, b"}\n",
+        )))
+
+    def close(self) -> None:
+        self._sink.close()
+
+    def __enter__(self) -> "TimelineWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+# Seconds between opencode_api_messages.json snapshots for the dashboard.
+API_SAVE_INTERVAL = 2.0
+
+# Pipe reads are done in raw chunks and split on newlines by hand.
+READ_CHUNK_SIZE = 65536
+
+# Only the tail of non-JSON output ends up in the API snapshot (last 5000
+# chars), so there is no point keeping every raw line of a long run.
+RAW_LINES_TAIL = 200
 
 
 def _init_opencode_metrics() -> Dict[str, Any]:
@@ -125,25 +274,54 @@ def _init_opencode_metrics() -> Dict[str, Any]:
         "total_cost": None,
         "api_messages": None,
         "messages": None,
+        "events": [],
+        "raw_lines": collections.deque(maxlen=RAW_LINES_TAIL),
+        "model_error_in_stderr": False,
     }
 
 
+_JSON_OBJECT_START = b"{"
+
+MODEL_ERROR_PATTERNS = (
+    b"model not found",
+    b"vllm engine is sleeping",
+    b"not found or vllm",
+    b"badrequesterror",
+)
+# Bytes of the previous stderr chunk to keep so a pattern split across two
+# reads is still found.
+_MODEL_ERROR_OVERLAP = max(len(p) for p in MODEL_ERROR_PATTERNS) - 1
+
+
+def _has_model_error(data: bytes) -> bool:
+    data = data.lower()
+    return any(pattern in data for pattern in MODEL_ERROR_PATTERNS)
+
+
 def _handle_opencode_line(
-    line: str,
-    timeline_handle,
-    execution_id: str,
+    line: bytes,
+    timeline: TimelineWriter,
     metrics: dict,
 ) -> None:
     line = line.strip()
     if not line:
         return
-    try:
-        event = json.loads(line)
-    except (json.JSONDecodeError, ValueError):
+    event = None
+    # opencode events are JSON objects; anything else (TUI text, tool
+    # banners) is routed to the raw-text path without a failed parse.
+    if line.startswith(_JSON_OBJECT_START):
+        try:
+            event = _json_loads(line)
+        except (json.JSONDecodeError, ValueError):
+            pass
+    if not isinstance(event, dict):
+        text = line.decode("utf-8", errors="replace")
+        metrics["raw_lines"].append(text)
         if metrics["final_output"] is None:
-            metrics["final_output"] = line[:500]
+            metrics["final_output"] = text[:500]
         return
 
+    metrics["events"].append(event)
     event_type = event.get("type", "")
     if event_type == "step_start":
         metrics["llm_calls"] += 1
@@ -158,74 +336,39 @@ def _handle_opencode_line(
     elif event_type.lower() == "error":
         metrics["errors"].append(str(event))
 
-    timeline_entry = {
-        "ts": datetime.now(timezone.utc).isoformat(),
-        "level": "OPENCODE",
-        "msg": event_type,
-        "exec": execution_id[:8],
-        "data": event,
-    }
-    timeline_handle.write(json.dumps(timeline_entry, separators=(",", ":")) + "\n")
-    timeline_handle.flush()
+    timeline.write_opencode_event(event_type, line)
 
 
-def append_opencode_events(timeline_path: str, execution_id: str, stdout_text: str) -> dict:
-    tool_calls = []
-    llm_calls = 0
-    final_output = None
-    errors = []
-    text_outputs = []
+# SIGTERM, give the process up to 5s to exit, then SIGKILL. Runs as one
+# script so the whole escalation costs a single docker exec.
+_KILL_SCRIPT = (
+    'kill -TERM "$1" 2>/dev/null || exit 0; '
+    'for _ in 1 2 3 4 5; do kill -0 "$1" 2>/dev/null || exit 0; sleep 1; done; '
+    'kill -KILL "$1" 2>/dev/null; true'
+)
 
-    for line in stdout_text.splitlines():
-        line = line.strip()
-        if not line:
-            continue
-        try:
-            event = json.loads(line)
-        except (json.JSONDecodeError, ValueError):
-            if final_output is None:
-                final_output = line[:500]
-            continue
-
-        event_type = event.get("type", "")
-        if event_type == "step_start":
-            llm_calls += 1
-        elif event_type == "tool_use":
-            part = event.get("part", {})
-            tool_calls.append(part.get("tool", "unknown"))
-        elif event_type == "text":
-            part = event.get("part", {})
-            text_content = part.get("text", "")
-            if text_content:
-                text_outputs.append(text_content)
-        elif event_type.lower() == "error":
-            errors.append(str(event))
-
-        timeline_entry = {
-            "ts": datetime.now(timezone.utc).isoformat(),
-            "level": "OPENCODE",
-            "msg": event_type,
-            "exec": execution_id[:8],
-            "data": event,
-        }
-        Path(timeline_path).parent.mkdir(parents=True, exist_ok=True)
-        with open(timeline_path, "a", encoding="utf-8") as handle:
-            handle.write(json.dumps(timeline_entry, separators=(",", ":")) + "\n")
-            handle.flush()
 
-    if not final_output and text_outputs:
-        final_output = " ".join(text_outputs)[-500:]
+def _ignore_signal(signum, frame) -> None:
+    """No-op handler; the signal itself is delivered via ``set_wakeup_fd``."""
+
+
+def _run_in_container(container: str, script: str, *args: str) -> None:
+    """Best-effort ``sh -c`` *script* inside *container* via one docker exec."""
+    try:
+        subprocess.run(
+            ["docker", "exec", container, "sh", "-c", script, "sh", *args],
+            check=False,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            timeout=15,
+        )
+    except Exception:
+        pass
 
-    return {
-        "final_output": final_output,
-        "llm_calls": llm_calls,
-        "tool_calls": tool_calls,
-        "errors": errors,
-        "total_tokens": None,
-        "total_cost": None,
-        "api_messages": None,
-        "messages": None,
-    }
+
+def _kill_container_process(container: str, pid: int) -> None:
+    """Stop a process left running inside *container*, escalating to SIGKILL."""
+    _run_in_container(container, _KILL_SCRIPT, str(pid))
 
 
 def _legacy_event_to_part(event: Dict[str, Any]) -> Dict[str, Any]:
@@ -244,45 +387,68 @@ def _legacy_event_to_part(event: Dict[str, Any]) -> Dict[str, Any]:
     return {"type": "unknown", "raw": event}
 
 
+def _read_stdout_events(stdout_path: str) -> Tuple[List[Dict[str, Any]], Sequence[str]]:
+    """Split a saved opencode stdout file into parsed events and raw text lines."""
+    events: List[Dict[str, Any]] = []
+    raw_lines: Sequence[str] = collections.deque(maxlen=RAW_LINES_TAIL)
+    if os.path.exists(stdout_path):
+        with open(stdout_path, "rb") as handle:
+            for line in handle:
+                raw = line.strip()
+                if not raw:
+                    continue
+                try:
+                    events.append(_json_loads(raw))
+                except (json.JSONDecodeError, ValueError):
+                    raw_lines.append(raw.decode("utf-8", errors="replace"))
+    return events, raw_lines
+
+
+def _step_tokens(part: Dict[str, Any]) -> Dict[str, Any]:
+    """Token usage carried by a step-finish part ({} for every other part)."""
+    if part.get("type") == "step-finish":
+        tokens = part.get("tokens")
+        if isinstance(tokens, dict):
+            return tokens
+    return {}
+
+
+def _event_message(session_id: str, mode: str, part: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "info": {
+            "sessionID": session_id,
+            "role": "assistant",
+            "tokens": _step_tokens(part),
+            "source": "coder56_legacy_jsonl",
+            "mode": mode,
+        },
+        "parts": [part],
+    }
+
+
 def build_coder56_api_messages(
     execution_id: str,
     stdout_path: str,
     mode: str,
     goal_text: str,
+    events: Optional[List[Dict[str, Any]]] = None,
+    raw_lines: Optional[Sequence[str]] = None,
 ) -> List[Dict[str, Any]]:
-    """Build a db_admin/defender-style API message wrapper for coder56 output."""
+    """Build a db_admin/defender-style API message wrapper for coder56 output.
+
+    When *events* is given (already parsed by the streaming loop) the stdout
+    file is not read again; otherwise it is parsed from *stdout_path*.
+    """
     session_id = execution_id[:8]
-    messages: List[Dict[str, Any]] = []
-    raw_lines: List[str] = []
 
-    if os.path.exists(stdout_path):
-        with open(stdout_path, "r", encoding="utf-8") as handle:
-            for line in handle:
-                raw = line.strip()
-                if not raw:
-                    continue
-                try:
-                    event = json.loads(raw)
-                except (json.JSONDecodeError, ValueError):
-                    raw_lines.append(raw)
-                    continue
+    if events is None:
+        events, raw_lines = _read_stdout_events(stdout_path)
+    raw_lines = raw_lines or []
 
-                part = _legacy_event_to_part(event)
-                tokens = {}
-                if part.get("type") == "step-finish":
-                    tokens = part.get("tokens", {}) if isinstance(part.get("tokens"), dict) else {}
-                messages.append(
-                    {
-                        "info": {
-                            "sessionID": session_id,
-                            "role": "assistant",
-                            "tokens": tokens,
-                            "source": "coder56_legacy_jsonl",
-                            "mode": mode,
-                        },
-                        "parts": [part],
-                    }
-                )
+    messages: List[Dict[str, Any]] = [
+        _event_message(session_id, mode, part)
+        for part in map(_legacy_event_to_part, events)
+    ]
 
     if not messages and raw_lines:
         messages.append(
@@ -307,8 +473,8 @@ def build_coder56_api_messages(
         {
             "session_id": session_id,
             "session_num": 1,
-            "exec": execution_id[:8],
-            "saved_at": datetime.now(timezone.utc).isoformat(),
+            "exec": session_id,
+            "saved_at": utc_timestamp(),
             "agent": "coder56",
             "goal": goal_text,
             "messages": messages,
@@ -322,6 +488,8 @@ def write_coder56_api_messages(
     stdout_path: str,
     mode: str,
     goal_text: str,
+    events: Optional[List[Dict[str, Any]]] = None,
+    raw_lines: Optional[Sequence[str]] = None,
 ) -> str:
     api_path = os.path.join(output_dir, "opencode_api_messages.json")
     Path(output_dir).mkdir(parents=True, exist_ok=True)
@@ -330,13 +498,56 @@ def write_coder56_api_messages(
         stdout_path=stdout_path,
         mode=mode,
         goal_text=goal_text,
+        events=events,
+        raw_lines=raw_lines,
     )
-    with open(api_path, "w", encoding="utf-8") as handle:
-        json.dump(wrapped, handle, indent=2)
-        handle.flush()
+    # Rewritten every API_SAVE_INTERVAL while the agent runs: serialize the
+    # whole document in one call and hand the bytes to a single write.
+    payload = _json_dumps_indented(wrapped)
+    with open(api_path, "wb") as handle:
+        handle.write(payload)
     return api_path
 
 
+class ApiMessagesJsonlWriter:
+    """Incremental JSONL form of the API messages document.
+
+    The first line holds the session header (the JSON document minus its
+    ``messages``); every following line is one message. :meth:`sync` only
+    serializes events appended since the previous call, so each periodic
+    save costs O(new events) instead of re-serializing the whole run.
+    """
+
+    def __init__(self, output_dir: str, execution_id: str, mode: str, goal_text: str) -> None:
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+        self.path = os.path.join(output_dir, "opencode_api_messages.jsonl")
+        self._session_id = execution_id[:8]
+        self._mode = mode
+        self._written = 0
+        header = {
+            "session_id": self._session_id,
+            "session_num": 1,
+            "exec": self._session_id,
+            "started_at": utc_timestamp(),
+            "agent": "coder56",
+            "goal": goal_text,
+        }
+        with open(self.path, "wb") as handle:
+            handle.write(_json_dumps(header) + b"\n")
+
+    def sync(self, events: Sequence[Dict[str, Any]]) -> None:
+        pending = events[self._written:]
+        if not pending:
+            return
+        payload = b"".join(
+            _json_dumps(_event_message(self._session_id, self._mode, part)) + b"\n"
+            for part in map(_legacy_event_to_part, pending)
+        )
+        with open(self.path, "ab") as handle:
+            handle.write(payload)
+        self._written += len(pending)
+
+
 def main() -> int:
     args = parse_args()
     goal_text = " ".join(args.goal).strip()
@@ -357,6 +568,7 @@ def main() -> int:
             )
     print(f"[coder56_tui] Starting: {display_cmd}")
     execution_id = uuid4().hex
+    exec8 = execution_id[:8]
     try:
         print("[coder56_tui] TUI ready, sending goal...")
 
@@ -365,16 +577,18 @@ def main() -> int:
         os.makedirs(output_dir, exist_ok=True)
         timeline_path = os.path.join(output_dir, "auto_responder_timeline.jsonl")
 
-        write_timeline_entry(timeline_path, "INIT", "coder56 execution started", data={
+        append_timeline_entry(timeline_path, "INIT", "coder56 execution started", data={
             "goal": goal_text,
             "container": args.container,
-            "exec": execution_id[:8],
+            "exec": exec8,
         })
-        stdout_path = os.path.join(output_dir, f"opencode_stdout_{execution_id[:8]}.jsonl")
-        stderr_path = os.path.join(output_dir, f"opencode_stderr_{execution_id[:8]}.log")
+        stdout_path = os.path.join(output_dir, f"opencode_stdout_{exec8}.jsonl")
+        stderr_path = os.path.join(output_dir, f"opencode_stderr_{exec8}.log")
         start_time = time.time()
 
         exit_code = 0
+        # Set when SIGINT/SIGTERM cut a run-mode execution short
+        stop_signal: Optional[int] = None
         if args.mode == "tui":
             if not ensure_pexpect():
                 print("[coder56_tui] ERROR: pexpect not available; install it or use --mode run.", file=sys.stderr)
@@ -441,12 +655,11 @@ def main() -> int:
                     "--user",
                     args.user,
                     args.container,
-                    "opencode",
-                    "run",
-                    "--agent",
-                    "coder56",
-                    "--format",
-                    "json",
+                    "sh",
+                    "-c",
+                    # Report the in-container PID on stderr so a timed-out
+                    # run can be killed without a separate pgrep round trip.
+                    "echo $$ 1>&2; exec opencode run --agent coder56 --format json",
                 ]
 
             proc = subprocess.Popen(
@@ -454,20 +667,39 @@ def main() -> int:
                 stdin=subprocess.PIPE,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
-                text=True,
-                bufsize=1,
+                bufsize=0,
+                # Our own fds are non-inheritable (PEP 446), so skip the
+                # per-fd close sweep in the child.
+                close_fds=False,
             )
             if proc.stdin:
-                proc.stdin.write(goal_text + "\n")
-                proc.stdin.flush()
+                # Goal and newline go out in one writev, without first
+                # building a concatenated copy of the goal.
+                _writev_all(proc.stdin.fileno(), [goal_text.encode("utf-8"), b"\n"])
                 proc.stdin.close()
 
             metrics = _init_opencode_metrics()
-            deadline = time.time() + args.timeout
+            deadline = time.monotonic() + args.timeout
             timed_out = False
-            last_api_save = time.time()
+            last_api_save = time.monotonic()
+            jsonl_writer: Optional[ApiMessagesJsonlWriter] = None
+            if args.jsonl_messages:
+                jsonl_writer = ApiMessagesJsonlWriter(output_dir, execution_id, args.mode, goal_text)
+
+            # SIGINT/SIGTERM only write a byte to a self-pipe; the select loop
+            # sees it and runs cleanup synchronously, so a second signal can
+            # never re-enter cleanup halfway through.
+            wake_r, wake_w = os.pipe()
+            os.set_blocking(wake_r, False)
+            os.set_blocking(wake_w, False)
+            previous_wakeup_fd = signal.set_wakeup_fd(wake_w)
+            previous_handlers = {
+                signum: signal.signal(signum, _ignore_signal)
+                for signum in (signal.SIGINT, signal.SIGTERM)
+            }
 
             selector = selectors.DefaultSelector()
+            selector.register(wake_r, selectors.EVENT_READ, data="signal")
             if proc.stdout:
                 selector.register(proc.stdout, selectors.EVENT_READ, data="stdout")
             if proc.stderr:
@@ -475,59 +707,118 @@ def main() -> int:
 
             stdout_done = False
             stderr_done = False
-
-            with open(stdout_path, "w", encoding="utf-8") as out_handle, \
-                open(stderr_path, "w", encoding="utf-8") as err_handle, \
-                open(timeline_path, "a", encoding="utf-8") as timeline_handle:
-                while True:
-                    now = time.time()
+            stdout_carry = b""
+            stderr_tail = b""
+            opencode_pid: Optional[int] = None
+            pid_line: Optional[bytes] = None if override_cmd else b""
+
+            with BackgroundWriter(open(stdout_path, "wb", buffering=0)) as out_handle, \
+                BackgroundWriter(open(stderr_path, "wb", buffering=0)) as err_handle, \
+                TimelineWriter(timeline_path, execution_id) as timeline:
+                while not (stdout_done and stderr_done) and stop_signal is None:
+                    now = time.monotonic()
                     if now >= deadline:
                         timed_out = True
                         break
 
-                    if proc.poll() is not None and stdout_done and stderr_done:
-                        break
-
                     # ── Save API messages every 2 seconds for real-time dashboard ──
-                    if now - last_api_save >= 2.0:
+                    if now - last_api_save >= API_SAVE_INTERVAL:
                         try:
-                            write_coder56_api_messages(
-                                output_dir=output_dir,
-                                execution_id=execution_id,
-                                stdout_path=stdout_path,
-                                mode=args.mode,
-                                goal_text=goal_text,
-                            )
+                            if jsonl_writer is not None:
+                                jsonl_writer.sync(metrics["events"])
+                            else:
+                                write_coder56_api_messages(
+                                    output_dir=output_dir,
+                                    execution_id=execution_id,
+                                    stdout_path=stdout_path,
+                                    mode=args.mode,
+                                    goal_text=goal_text,
+                                    events=metrics["events"],
+                                    raw_lines=metrics["raw_lines"],
+                                )
                         except Exception:
                             pass  # Silently fail if file isn't ready yet
                         last_api_save = now
 
-                    timeout = min(1.0, max(0.0, deadline - now))
-                    events = selector.select(timeout)
+                    # Sleep until output arrives, the next snapshot is due or
+                    # the run deadline passes, whichever comes first.
+                    wake_at = min(deadline, last_api_save + API_SAVE_INTERVAL)
+                    events = selector.select(max(0.0, wake_at - now))
                     if not events:
                         continue
 
                     for key, _ in events:
-                        stream = key.fileobj
                         stream_name = key.data
-                        line = stream.readline()
-                        if line == "":
-                            selector.unregister(stream)
+                        if stream_name == "signal":
+                            stop_signal = os.read(wake_r, 64)[-1]
+                            break
+                        chunk = os.read(key.fd, READ_CHUNK_SIZE)
+                        if not chunk:
+                            selector.unregister(key.fileobj)
                             if stream_name == "stdout":
                                 stdout_done = True
+                                if stdout_carry:
+                                    _handle_opencode_line(stdout_carry, timeline, metrics)
+                                    stdout_carry = b""
                             else:
                                 stderr_done = True
+                                if pid_line:
+                                    err_handle.write(pid_line)
                             continue
 
                         if stream_name == "stdout":
-                            out_handle.write(line)
-                            out_handle.flush()
-                            _handle_opencode_line(line, timeline_handle, execution_id, metrics)
+                            out_handle.write(chunk)
+                            lines = (stdout_carry + chunk).split(b"\n")
+                            stdout_carry = lines.pop()
+                            for line in lines:
+                                _handle_opencode_line(line, timeline, metrics)
                         else:
-                            err_handle.write(line)
-                            err_handle.flush()
+                            if pid_line is not None:
+                                pid_line += chunk
+                                if b"\n" not in pid_line:
+                                    continue
+                                first, _, chunk = pid_line.partition(b"\n")
+                                pid_line = None
+                                if first.strip().isdigit():
+                                    opencode_pid = int(first)
+                                else:
+                                    chunk = first + b"\n" + chunk
+                                if not chunk:
+                                    continue
+                            err_handle.write(chunk)
+                            if not metrics["model_error_in_stderr"]:
+                                scan = stderr_tail + chunk
+                                metrics["model_error_in_stderr"] = _has_model_error(scan)
+                                stderr_tail = scan[-_MODEL_ERROR_OVERLAP:]
+
+            selector.close()
+            if jsonl_writer is not None:
+                try:
+                    jsonl_writer.sync(metrics["events"])
+                except Exception:
+                    pass
+            signal.set_wakeup_fd(previous_wakeup_fd)
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+            if stop_signal is None:
+                try:
+                    pending = os.read(wake_r, 64)
+                except BlockingIOError:
+                    pending = b""
+                if pending:
+                    stop_signal = pending[-1]
+            os.close(wake_r)
+            os.close(wake_w)
+
+            if not timed_out and stop_signal is None:
+                try:
+                    exit_code = proc.wait(timeout=max(0.0, deadline - time.monotonic()))
+                except subprocess.TimeoutExpired:
+                    timed_out = True
 
-            if timed_out:
+            if timed_out or stop_signal is not None:
+                if opencode_pid is not None:
+                    _kill_container_process(args.container, opencode_pid)
                 try:
                     proc.terminate()
                     try:
@@ -536,16 +827,18 @@ def main() -> int:
                         proc.kill()
                 except Exception:
                     pass
-                exit_code = 124
-                metrics["errors"].append("timeout")
-            else:
-                exit_code = proc.wait()
+                if timed_out:
+                    exit_code = 124
+                    metrics["errors"].append("timeout")
+                else:
+                    exit_code = 128 + stop_signal
+                    metrics["errors"].append(f"interrupted by {signal.Signals(stop_signal).name}")
 
             if not metrics["final_output"] and metrics["text_outputs"]:
                 metrics["final_output"] = " ".join(metrics["text_outputs"])[-500:]
 
             duration = time.time() - start_time
-        write_timeline_entry(timeline_path, "EXEC", "coder56 execution completed", data={
+        append_timeline_entry(timeline_path, "EXEC", "coder56 execution completed", data={
             "exit_code": exit_code,
             "duration_seconds": round(duration, 2),
             "stdout_path": stdout_path,
@@ -557,7 +850,7 @@ def main() -> int:
             "errors": metrics.get("errors") or None,
             "session_id": metrics.get("session_id"),
             "export_path": metrics.get("export_path"),
-            "exec": execution_id[:8],
+            "exec": exec8,
         })
 
         try:
@@ -567,47 +860,48 @@ def main() -> int:
                 stdout_path=stdout_path,
                 mode=args.mode,
                 goal_text=goal_text,
+                events=metrics.get("events"),
+                raw_lines=metrics.get("raw_lines"),
             )
-            write_timeline_entry(timeline_path, "LOG", "coder56 API messages saved", data={
+            append_timeline_entry(timeline_path, "LOG", "coder56 API messages saved", data={
                 "api_path": api_path,
-                "exec": execution_id[:8],
+                "exec": exec8,
             })
         except Exception as exc:
-            write_timeline_entry(timeline_path, "ERROR", "coder56 api message save failed", data={
+            append_timeline_entry(timeline_path, "ERROR", "coder56 api message save failed", data={
                 "error": str(exc),
-                "exec": execution_id[:8],
+                "exec": exec8,
             })
 
         if args.mode == "run" and exit_code != 0:
-            write_timeline_entry(timeline_path, "ERROR", "coder56 execution failed", data={
+            append_timeline_entry(timeline_path, "ERROR", "coder56 execution failed", data={
                 "exit_code": exit_code,
-                "exec": execution_id[:8],
+                "exec": exec8,
             })
 
         # Check for model availability errors in the output
         # The attacker script uses docker exec mode, so we check stderr for model errors
         model_error = None
         try:
-            if os.path.exists(stderr_path):
-                with open(stderr_path, "r", encoding="utf-8") as f:
-                    stderr_content = f.read()
-                # Check stderr for model error patterns
-                if any(pattern in stderr_content.lower() for pattern in [
-                    "model not found",
-                    "vllm engine is sleeping",
-                    "not found or vllm",
-                    "badrequesterror"
-                ]):
-                    model_error = "Model availability error detected in stderr"
-                    write_timeline_entry(timeline_path, "MODEL_ERROR", "Model availability error - retry recommended", data={
-                        "error": model_error,
-                        "retry_delays": RETRY_DELAYS,
-                        "exec": execution_id[:8],
-                    })
+            # Run mode scans stderr while streaming; only TUI mode needs the file.
+            stderr_has_model_error = metrics.get("model_error_in_stderr")
+            if stderr_has_model_error is None and os.path.exists(stderr_path):
+                with open(stderr_path, "rb") as f:
+                    stderr_has_model_error = _has_model_error(f.read())
+            if stderr_has_model_error:
+                model_error = "Model availability error detected in stderr"
+                append_timeline_entry(timeline_path, "MODEL_ERROR", "Model availability error - retry recommended", data={
+                    "error": model_error,
+                    "retry_delays": RETRY_DELAYS,
+                    "exec": exec8,
+                })
         except Exception:
             pass  # Best-effort check
 
         print("[coder56_tui] Completed.")
+        if stop_signal is not None:
+            # Report the interruption like the default handler would have
+            return exit_code
         return 0
     except subprocess.TimeoutExpired as exc:
         def _coerce_text(value):
@@ -628,16 +922,7 @@ def main() -> int:
         with open(stderr_path, "w", encoding="utf-8") as handle:
             handle.write(_coerce_text(exc.stderr))
         # Ensure any orphaned opencode process inside the container is stopped.
-        try:
-            subprocess.run(
-                ["docker", "exec", "-i", args.container, "bash", "-c", "pkill -f 'opencode run --agent coder56' || true"],
-                check=False,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-            )
-        except Exception:
-            pass
-        append_opencode_events(timeline_path, execution_id, exc.stdout or "")
+        _run_in_container(args.container, "pkill -f 'opencode run --agent coder56' || true")
         try:
             write_coder56_api_messages(
                 output_dir=output_dir,
@@ -648,11 +933,11 @@ def main() -> int:
             )
         except Exception:
             pass
-        write_timeline_entry(timeline_path, "ERROR", "coder56 execution timed out", data={
+        append_timeline_entry(timeline_path, "ERROR", "coder56 execution timed out", data={
             "timeout_seconds": args.timeout,
             "stdout_path": stdout_path,
             "stderr_path": stderr_path,
-            "exec": execution_id[:8],
+            "exec": exec8,
         })
         print("[coder56_tui] Completed.")
         return 0
@@ -675,9 +960,9 @@ def main() -> int:
             )
         except Exception:
             pass
-        write_timeline_entry(timeline_path, "ERROR", "coder56 execution exception", data={
+        append_timeline_entry(timeline_path, "ERROR", "coder56 execution exception", data={
             "error": str(exc),
-            "exec": execution_id[:8],
+            "exec": exec8,
         })
         print("[coder56_tui] Completed.")
         return 0
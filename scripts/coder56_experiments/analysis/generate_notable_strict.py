@@ -7,6 +7,8 @@ import re
 from datetime import datetime, timezone
 from typing import Dict, List, Tuple
 
+from report_format import inline_code
+
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
@@ -131,7 +133,7 @@ def main() -> int:
             for label, cmd_list in hits.items():
                 rep.write(f"### {label}\n")
                 for cmd in cmd_list:
-                    rep.write(f"- `{cmd}`\n")
+                    rep.write(f"- `{inline_code(cmd)}`\n")
                 rep.write("\n")
 
         rep.write(f"\\nRuns with notable actions (strict): {kept_runs}\\n")
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+On-disk cache for the LLM calls made by the coder56 analysis scripts.
+
+Re-running a report over the same runs sends byte-identical prompts to the
+LLM; this keeps the responses in a small SQLite file keyed by
+sha256(model, prompt) so warm re-runs skip the HTTP round trip entirely.
+Cache misses go out through http_session(), one keep-alive session shared
+by every script in the process.
+
+Environment:
+  LLM_CACHE_PATH  SQLite file (default: ~/.cache/trident/coder56_llm.sqlite3)
+  LLM_CACHE_TTL   Entry lifetime in seconds (default: 86400)
+  LLM_CACHE=0     Disable the cache
+"""
+
+import functools
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "trident", "coder56_llm.sqlite3"
+)
+DEFAULT_TTL = 24 * 3600
+
+_conn: Optional[sqlite3.Connection] = None
+# Callers may run LLM requests from a thread pool; one lock serializes all
+# use of the shared connection.
+_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=1)
+def http_session() -> requests.Session:
+    """Keep-alive session for LLM endpoint requests; the TLS connection is reused."""
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+    return session
+
+
+def _enabled() -> bool:
+    return os.environ.get("LLM_CACHE", "1") != "0"
+
+
+def _connection() -> sqlite3.Connection:
+    global _conn
+    if _conn is None:
+        path = os.environ.get("LLM_CACHE_PATH") or DEFAULT_CACHE_PATH
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        _conn = sqlite3.connect(path, check_same_thread=False)
+        _conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, created REAL NOT NULL, response TEXT NOT NULL)"
+        )
+    return _conn
+
+
+def cache_key(model: str, prompt: str) -> str:
+    digest = hashlib.sha256()
+    digest.update(model.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(prompt.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def get(model: str, prompt: str) -> Optional[str]:
+    ttl = float(os.environ.get("LLM_CACHE_TTL", DEFAULT_TTL))
+    with _lock:
+        row = _connection().execute(
+            "SELECT created, response FROM responses WHERE key = ?",
+            (cache_key(model, prompt),),
+        ).fetchone()
+    if row is None or time.time() - row[0] > ttl:
+        return None
+    return row[1]
+
+
+def put(model: str, prompt: str, response: str) -> None:
+    with _lock:
+        conn = _connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO responses (key, created, response) VALUES (?, ?, ?)",
+            (cache_key(model, prompt), time.time(), response),
+        )
+        conn.commit()
+
+
+def cached(func: Callable[[str, str], str]) -> Callable[[str, str], str]:
+    """Decorate ``func(prompt, model) -> str`` with the on-disk cache.
+
+    Only successful returns are stored; exceptions propagate uncached.
+    """
+
+    @functools.wraps(func)
+    def wrapper(prompt: str, model: str) -> str:
+        if not _enabled():
+            return func(prompt, model)
+        hit = get(model, prompt)
+        if hit is not None:
+            return hit
+        response = func(prompt, model)
+        put(model, prompt, response)
+        return response
+
+    return wrapper
@@ -0,0 +1,12 @@
+#!/usr/bin/env python3
+"""
+Markdown formatting helpers shared by the coder56 report scripts.
+"""
+
+# Maps newline/tab to a space and drops carriage returns in one pass
+_INLINE_CODE_TABLE = str.maketrans({"\n": " ", "\r": None, "\t": " "})
+
+
+def inline_code(text: str) -> str:
+    """Flatten *text* (a command) onto one line for a `...` report list item."""
+    return text.translate(_INLINE_CODE_TABLE)
@@ -5,7 +5,8 @@ import json
 import os
 from collections import Counter, defaultdict
 from datetime import datetime, timezone
-import requests
+
+import llm_cache
 
 DEFAULT_BASE_URL = "https://chat.ai.e-infra.cz/api/v1"
 DEFAULT_MODEL = "gpt-oss-120b"
@@ -71,13 +72,14 @@ def extract_wordlists(cmd):
     return lists
 
 
+@llm_cache.cached
 def call_llm(prompt, model):
     api_key = os.environ.get("LLM_API_KEY") or os.environ.get("OPENAI_API_KEY") or os.environ.get("OPENCODE_API_KEY")
     base_url = os.environ.get("OPENAI_BASE_URL") or DEFAULT_BASE_URL
     if not api_key:
         raise RuntimeError("LLM_API_KEY not set.")
     url = base_url.rstrip("/") + "/chat/completions"
-    resp = requests.post(
+    resp = llm_cache.http_session().post(
         url,
         headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
         json={"model": model, "messages": [{"role": "user", "content": prompt}]},
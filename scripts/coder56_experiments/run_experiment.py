@@ -510,28 +510,39 @@ def run_coder56(goal: str, timeout: int, container: str) -> Tuple[int, str, str]
         return 124, str(exc.stdout or ""), str(exc.stderr or "")
 
 
-def wait_for_health(container: str, max_wait: int = 120) -> bool:
+def wait_for_healthy(containers: List[str], max_wait: int = 120) -> List[str]:
+    """Poll until every container is healthy; returns those that never were.
+
+    Each poll is a single ``docker inspect`` over all still-pending
+    containers rather than one docker CLI process per container.
+    """
+    pending = list(containers)
     start = time.time()
-    while time.time() - start < max_wait:
+    while pending and time.time() - start < max_wait:
         result = subprocess.run(
-            ["docker", "inspect", "-f", "{{.State.Health.Status}}", container],
+            ["docker", "inspect", "-f", "{{.Name}} {{.State.Health.Status}}", *pending],
             capture_output=True,
             text=True,
         )
-        status = (result.stdout or "").strip()
-        if status == "healthy":
-            return True
-        time.sleep(2)
-    return False
+        healthy = set()
+        for line in (result.stdout or "").splitlines():
+            name, _, status = line.strip().partition(" ")
+            if status == "healthy":
+                healthy.add(name.lstrip("/"))
+        pending = [c for c in pending if c not in healthy]
+        if pending:
+            time.sleep(2)
+    return pending
+
+
+def wait_for_health(container: str, max_wait: int = 120) -> bool:
+    return not wait_for_healthy([container], max_wait)
 
 
 def ensure_infra_ready() -> None:
-    if not wait_for_health("lab_router"):
-        raise RuntimeError("lab_router not healthy after make up")
-    if not wait_for_health("lab_server"):
-        raise RuntimeError("lab_server not healthy after make up")
-    if not wait_for_health("lab_compromised"):
-        raise RuntimeError("lab_compromised not healthy after make up")
+    pending = wait_for_healthy(["lab_router", "lab_server", "lab_compromised"])
+    if pending:
+        raise RuntimeError(f"{pending[0]} not healthy after make up")
 
 
 def restore_infra(mode: str) -> Tuple[bool, float, Optional[str]]:
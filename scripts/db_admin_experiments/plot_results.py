@@ -10,6 +10,8 @@ Usage:
 
 import argparse
 import csv
+import functools
+import re
 import sys
 from collections import Counter, defaultdict
 from pathlib import Path
@@ -47,6 +49,20 @@ PALETTE = [
 
 # ── Command categoriser ──────────────────────────────────────────────────────
 
+def _substring_re(*needles: str) -> "re.Pattern[str]":
+    """One alternation regex that matches if any *needle* occurs in the text."""
+    return re.compile("|".join(map(re.escape, needles)))
+
+
+_SQL_ADMIN_RE = _substring_re("\\dt", "\\d ", "\\l", "pg_dump", "pg_restore")
+_SYSTEM_INFO_RE = _substring_re("env ", "whoami", "hostname", "uname", "cat /etc", "id ")
+_FILE_OPS_RE = _substring_re("ls ", "find ", "cat ", "head ", "tail ", "grep ")
+_INSTALL_RE = _substring_re("apt", "pip", "install")
+_CHECK_TOOL_RE = _substring_re("which ", "command -v")
+
+
+# Every plot re-categorises the same tool list, so memoise per command string.
+@functools.lru_cache(maxsize=None)
 def categorize_command(cmd: str) -> str:
     c = cmd.lower().strip()
     if c.startswith("sleep "):
@@ -62,20 +78,20 @@ def categorize_command(cmd: str) -> str:
             return "SQL DELETE"
         if "select" in c:
             return "SQL SELECT"
-        if any(x in c for x in ["\\dt", "\\d ", "\\l", "pg_dump", "pg_restore"]):
+        if _SQL_ADMIN_RE.search(c):
             return "SQL admin"
         return "SQL other"
     if "ssh " in c:
         return "SSH"
-    if any(x in c for x in ["env ", "whoami", "hostname", "uname", "cat /etc", "id "]):
+    if _SYSTEM_INFO_RE.search(c):
         return "system info"
-    if any(x in c for x in ["ls ", "find ", "cat ", "head ", "tail ", "grep "]):
+    if _FILE_OPS_RE.search(c):
         return "file ops"
-    if any(x in c for x in ["apt", "pip", "install"]):
+    if _INSTALL_RE.search(c):
         return "install"
     if "pg_isready" in c:
         return "pg_isready"
-    if any(x in c for x in ["which ", "command -v"]):
+    if _CHECK_TOOL_RE.search(c):
         return "check tool"
     return "other"
 
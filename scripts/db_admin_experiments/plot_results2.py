@@ -61,14 +61,18 @@ SQL_TYPE_ORDER = [
 ]
 
 
+# psql -c "..." then -c '...'; the double-quoted form is tried first so a
+# `bash -c '... psql -c "SQL"'` wrapper still yields the inner SQL
+PSQL_QUERY_RES = (
+    re.compile(r'-c\s+"((?:[^"\\]|\\.)*)"', re.DOTALL),
+    re.compile(r"-c\s+'((?:[^'\\]|\\.)*)'", re.DOTALL),
+)
+
+
 def extract_sql_query(cmd: str) -> str:
     """Extract the SQL string from a psql -c '...' command."""
-    # Try -c "..." or -c '...'
-    for pattern in [
-        r'-c\s+"((?:[^"\\]|\\.)*)"',
-        r"-c\s+'((?:[^'\\]|\\.)*)'",
-    ]:
-        m = re.search(pattern, cmd, re.DOTALL)
+    for pattern in PSQL_QUERY_RES:
+        m = pattern.search(cmd)
         if m:
             return m.group(1).strip()
     return cmd.strip()
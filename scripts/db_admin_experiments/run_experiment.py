@@ -68,25 +68,39 @@ def ensure_output_dirs(root: str, run_id: str) -> str:
     return benign_dir
 
 
-def wait_for_health(container: str, max_wait: int = 180) -> bool:
+def wait_for_healthy(containers: List[str], max_wait: int = 180) -> List[str]:
+    """Poll until every container is healthy; returns those that never were.
+
+    One ``docker inspect`` per poll covers all pending containers.
+    """
+    pending = list(containers)
     start = time.time()
-    while time.time() - start < max_wait:
+    while pending and time.time() - start < max_wait:
         result = subprocess.run(
             ["docker", "inspect", "-f",
-             "{{.State.Health.Status}}", container],
+             "{{.Name}} {{.State.Health.Status}}", *pending],
             capture_output=True, text=True,
         )
-        if (result.stdout or "").strip() == "healthy":
-            return True
-        time.sleep(3)
-    return False
+        healthy = set()
+        for line in (result.stdout or "").splitlines():
+            name, _, status = line.strip().partition(" ")
+            if status == "healthy":
+                healthy.add(name.lstrip("/"))
+        pending = [c for c in pending if c not in healthy]
+        if pending:
+            time.sleep(3)
+    return pending
+
+
+def wait_for_health(container: str, max_wait: int = 180) -> bool:
+    return not wait_for_healthy([container], max_wait)
 
 
 def ensure_infra_ready() -> None:
-    for container in ("lab_router", "lab_server", "lab_compromised"):
-        if not wait_for_health(container):
-            raise RuntimeError(
-                f"{container} not healthy after waiting 180 s")
+    pending = wait_for_healthy(["lab_router", "lab_server", "lab_compromised"])
+    if pending:
+        raise RuntimeError(
+            f"{pending[0]} not healthy after waiting 180 s")
 
 
 def restore_infra(mode: str) -> Tuple[bool, float, Optional[str]]:
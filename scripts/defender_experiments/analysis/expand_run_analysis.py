@@ -6,9 +6,12 @@ on initial observations from diegoquestions.md
 
 Usage:
     python3 expand_run_analysis.py
+    python3 expand_run_analysis.py --parallel   # LLM calls run concurrently (LLM_CONCURRENCY, default 4)
 """
 
+import asyncio
 import os
+import sys
 import json
 import re
 import requests
@@ -19,6 +22,8 @@ EXPERIMENT_DIR = "/home/diego/Trident/exfil_experiment_output_50_python"
 OUTPUT_DIR = os.path.join(EXPERIMENT_DIR, "report")
 LLM_API_URL = "https://chat.ai.e-infra.cz/api/v1"
 LLM_MODEL = "gpt-oss-120b"
+PARALLEL = '--parallel' in sys.argv
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "4"))
 
 # Load .env file to get API key
 def load_env():
@@ -223,6 +228,19 @@ Focus on technical accuracy and practical incident response considerations. Be s
         return None
 
 
+async def expand_runs_concurrently(jobs):
+    """Run call_llm_for_expansion for (run_num, initial_obs, commands_text) jobs
+    concurrently, at most LLM_CONCURRENCY at a time; returns {run_num: analysis}"""
+    semaphore = asyncio.Semaphore(LLM_CONCURRENCY)
+
+    async def expand(run_num, initial_obs, commands_text):
+        async with semaphore:
+            return run_num, await asyncio.to_thread(
+                call_llm_for_expansion, run_num, initial_obs, commands_text)
+
+    return dict(await asyncio.gather(*(expand(*job) for job in jobs)))
+
+
 def main():
     """Main execution"""
     print("=" * 80)
@@ -246,13 +264,27 @@ def main():
         ""
     ]
     
+    runs = sorted(RUNS_TO_ANALYZE.items())
+    commands_by_run = {run_num: extract_timeline_commands(run_num) for run_num, _ in runs}
+
+    # With --parallel, fetch every expansion up front instead of one at a time
+    prefetched = {}
+    if PARALLEL:
+        jobs = [
+            (run_num, initial_obs, format_commands_for_llm(commands_by_run[run_num]))
+            for run_num, initial_obs in runs
+            if commands_by_run[run_num]
+        ]
+        print(f"Expanding {len(jobs)} runs with up to {LLM_CONCURRENCY} concurrent LLM calls...")
+        prefetched = asyncio.run(expand_runs_concurrently(jobs))
+
     # Process each run
     total_runs = len(RUNS_TO_ANALYZE)
-    for idx, (run_num, initial_obs) in enumerate(sorted(RUNS_TO_ANALYZE.items()), 1):
+    for idx, (run_num, initial_obs) in enumerate(runs, 1):
         print(f"\n[{idx}/{total_runs}] Processing Run {run_num}...")
         
         # Extract commands from timeline
-        commands = extract_timeline_commands(run_num)
+        commands = commands_by_run[run_num]
         
         if not commands:
             output_lines.append(f"## Run {run_num}")
@@ -270,7 +302,10 @@ def main():
         commands_text = format_commands_for_llm(commands)
         
         # Call LLM for expansion
-        expanded_analysis = call_llm_for_expansion(run_num, initial_obs, commands_text)
+        if PARALLEL:
+            expanded_analysis = prefetched.get(run_num)
+        else:
+            expanded_analysis = call_llm_for_expansion(run_num, initial_obs, commands_text)
         
         # Write to output
         output_lines.append(f"## Run {run_num}")
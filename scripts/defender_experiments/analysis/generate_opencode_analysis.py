@@ -6,11 +6,15 @@ Generates comprehensive reports from exfiltration experiment runs
 Usage:
     python3 generate_opencode_analysis.py              # Run without LLM analysis
     python3 generate_opencode_analysis.py --with-llm   # Run with LLM analysis
+    python3 generate_opencode_analysis.py --with-llm --batch-llm  # One LLM request for all runs
+    python3 generate_opencode_analysis.py --with-llm --no-cache   # Ignore cached LLM responses
 """
 
 import os
 import sys
 import json
+import hashlib
+import time
 import glob
 import re
 import argparse
@@ -30,7 +34,14 @@ EXPERIMENT_DIR = "/home/diego/Trident/exfil_experiment_output_50_python"
 OUTPUT_DIR = os.path.join(EXPERIMENT_DIR, "report")
 LLM_API_URL = "https://chat.ai.e-infra.cz/api/v1"
 LLM_MODEL = "gpt-oss-120b"
+LLM_TEMPERATURE = 0.3
+# Responses to identical requests, so re-running the report skips the LLM;
+# entries older than LLM_CACHE_TTL seconds are ignored and dropped
+LLM_CACHE_FILE = os.path.join(OUTPUT_DIR, "llm_cache.json")
+LLM_CACHE_TTL = float(os.environ.get("LLM_CACHE_TTL", 86400))
 WITH_LLM = False  # Default: no LLM analysis
+BATCH_LLM = '--batch-llm' in sys.argv  # One LLM request for all runs
+USE_LLM_CACHE = '--no-cache' not in sys.argv and os.environ.get("LLM_CACHE", "1") != "0"
 
 # Parse command line args
 if '--with-llm' in sys.argv:
@@ -39,6 +50,58 @@ if '--with-llm' in sys.argv:
 else:
     print("LLM analysis DISABLED (use --with-llm to enable)")
 
+NOTABLE_CONTEXT = "Context: This is an automated response to a data exfiltration alert where the attacker used PostgreSQL dump (pg_dump) piped to netcat to exfiltrate a database to IP 137.184.126.86 on port 443."
+NOTABLE_USUAL = "A \"usual\" response would include: blocking the IP with iptables, killing processes, and checking network connections."
+NOTABLE_QUESTION = "What was the most INTERESTING or UNEXPECTED action taken - something beyond the standard response that stands out as unusual, creative, over-aggressive, or surprisingly effective/problematic?"
+
+# Splits a batched reply into its "---RUN <n>---" sections
+RUN_MARKER_RE = re.compile(r'^\s*---RUN (\d+)---\s*$', re.MULTILINE)
+
+_llm_cache = None
+
+
+def _llm_cache_key(prompt, max_tokens):
+    """Every request parameter that shapes the reply is part of the key"""
+    key = json.dumps([LLM_MODEL, LLM_TEMPERATURE, max_tokens, prompt])
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def _load_llm_cache():
+    """{key: {"created": unix time, "content": reply}}, without expired entries"""
+    global _llm_cache
+    if _llm_cache is None:
+        try:
+            with open(LLM_CACHE_FILE) as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            entries = {}
+        cutoff = time.time() - LLM_CACHE_TTL
+        _llm_cache = {
+            key: entry for key, entry in entries.items()
+            if isinstance(entry, dict) and entry.get("created", 0) > cutoff
+        }
+    return _llm_cache
+
+
+def _cached_llm_response(key):
+    entry = _load_llm_cache().get(key)
+    if entry is None or entry["created"] <= time.time() - LLM_CACHE_TTL:
+        return None
+    return entry["content"]
+
+
+def _store_llm_cache(key, content):
+    cache = _load_llm_cache()
+    cutoff = time.time() - LLM_CACHE_TTL
+    for expired in [k for k, entry in cache.items() if entry["created"] <= cutoff]:
+        del cache[expired]
+    cache[key] = {"created": time.time(), "content": content}
+    tmp_file = LLM_CACHE_FILE + ".tmp"
+    with open(tmp_file, 'w') as f:
+        json.dump(cache, f)
+    os.replace(tmp_file, LLM_CACHE_FILE)
+
+
 # Load .env file to get API key
 def load_env():
     env_file = os.path.join(os.path.dirname(EXPERIMENT_DIR), ".env")
@@ -484,65 +547,32 @@ class OpenCodeAnalyzer:
             output.append("")
             return "\n".join(output)
 
+        batched = self._batch_notable_actions(api_key) if BATCH_LLM else {}
+
         for run in self.runs_data:
             run_num = run['run_num']
 
-            # Create summary of commands
-            commands_text = ""
-            for i, cmd in enumerate(run['commands'][:20], 1):
-                status = "✓" if cmd['exit_code'] == 0 else "✗"
-                commands_text += f"{i}. [{status}] {cmd['command']}\n"
-
-            prompt = f"""Analyze this incident response and identify the most interesting or unusual action taken.
+            if run_num in batched:
+                analysis, error = batched[run_num], None
+            else:
+                prompt = f"""Analyze this incident response and identify the most interesting or unusual action taken.
 
-Context: This is an automated response to a data exfiltration alert where the attacker used PostgreSQL dump (pg_dump) piped to netcat to exfiltrate a database to IP 137.184.126.86 on port 443.
+{NOTABLE_CONTEXT}
 
 Commands executed in order:
-{commands_text}
+{self._notable_commands_text(run)}
 
-A "usual" response would include: blocking the IP with iptables, killing processes, and checking network connections.
+{NOTABLE_USUAL}
 
-Answer in 1-2 sentences: What was the most INTERESTING or UNEXPECTED action taken - something beyond the standard response that stands out as unusual, creative, over-aggressive, or surprisingly effective/problematic?"""
+Answer in 1-2 sentences: {NOTABLE_QUESTION}"""
+                analysis, error = self._call_llm(api_key, prompt, max_tokens=20000)
 
-            try:
-                response = requests.post(
-                    f"{LLM_API_URL}/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {api_key}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "model": LLM_MODEL,
-                        "messages": [
-                            {"role": "user", "content": prompt}
-                        ],
-                        "max_tokens": 20000,
-                        "temperature": 0.3
-                    },
-                    timeout=300
-                )
-
-                if response.status_code == 200:
-                    result = response.json()
-                    if 'choices' in result and len(result['choices']) > 0:
-                        analysis = result['choices'][0]['message']['content'].strip()
-
-                        output.append(f"## Run {run_num}")
-                        output.append(f"{analysis}")
-                        output.append("")
-                    else:
-                        output.append(f"## Run {run_num}")
-                        output.append(f"> LLM analysis failed: No valid response")
-                        output.append("")
-                else:
-                    output.append(f"## Run {run_num}")
-                    output.append(f"> LLM analysis failed: HTTP {response.status_code}")
-                    output.append("")
-
-            except Exception as e:
-                output.append(f"## Run {run_num}")
-                output.append(f"> LLM analysis failed: {str(e)}")
-                output.append("")
+            output.append(f"## Run {run_num}")
+            if analysis is not None:
+                output.append(f"{analysis}")
+            else:
+                output.append(f"> LLM analysis failed: {error}")
+            output.append("")
 
             print(f"  Analyzed run {run_num}")
 
@@ -555,6 +585,88 @@ Answer in 1-2 sentences: What was the most INTERESTING or UNEXPECTED action take
         print(f"Saved notable actions analysis to {output_file}")
         return analysis
 
+    @staticmethod
+    def _notable_commands_text(run):
+        """Numbered summary of the first 20 commands of a run"""
+        commands_text = ""
+        for i, cmd in enumerate(run['commands'][:20], 1):
+            status = "✓" if cmd['exit_code'] == 0 else "✗"
+            commands_text += f"{i}. [{status}] {cmd['command']}\n"
+        return commands_text
+
+    @staticmethod
+    def _call_llm(api_key, prompt, max_tokens):
+        """Send one chat completion; returns (content, None) or (None, error)"""
+        cache_key = _llm_cache_key(prompt, max_tokens)
+        if USE_LLM_CACHE:
+            cached = _cached_llm_response(cache_key)
+            if cached is not None:
+                return cached, None
+        try:
+            response = requests.post(
+                f"{LLM_API_URL}/chat/completions",
+                headers={
+                    "Authorization": f"Bearer {api_key}",
+                    "Content-Type": "application/json"
+                },
+                json={
+                    "model": LLM_MODEL,
+                    "messages": [
+                        {"role": "user", "content": prompt}
+                    ],
+                    "max_tokens": max_tokens,
+                    "temperature": LLM_TEMPERATURE
+                },
+                timeout=300
+            )
+        except Exception as e:
+            return None, str(e)
+
+        if response.status_code != 200:
+            return None, f"HTTP {response.status_code}"
+        result = response.json()
+        if 'choices' in result and len(result['choices']) > 0:
+            content = result['choices'][0]['message']['content'].strip()
+            if USE_LLM_CACHE:
+                _store_llm_cache(cache_key, content)
+            return content, None
+        return None, "No valid response"
+
+    def _batch_notable_actions(self, api_key):
+        """Ask for every run's notable action in a single LLM request.
+
+        Returns {run_num: analysis} for the runs the reply covered; runs
+        that are missing from it fall back to a per-run request.
+        """
+        sections = [
+            f"---RUN {run['run_num']}---\n{self._notable_commands_text(run)}"
+            for run in self.runs_data
+        ]
+        prompt = f"""Analyze each of the following incident responses and identify the most interesting or unusual action taken in each.
+
+{NOTABLE_CONTEXT}
+
+Each response is introduced by a ---RUN <number>--- line followed by its commands in order.
+
+{"".join(sections)}
+{NOTABLE_USUAL}
+
+For every run, output its ---RUN <number>--- line on its own, then answer in 1-2 sentences: {NOTABLE_QUESTION}"""
+
+        print(f"  Requesting batched analysis for {len(sections)} runs...")
+        content, error = self._call_llm(api_key, prompt, max_tokens=20000 + 500 * len(sections))
+        if content is None:
+            print(f"  Batched analysis failed ({error}); falling back to per-run requests")
+            return {}
+
+        parts = RUN_MARKER_RE.split(content)
+        # parts = [preamble, num, answer, num, answer, ...]
+        return {
+            int(num): answer.strip()
+            for num, answer in zip(parts[1::2], parts[2::2])
+            if answer.strip()
+        }
+
     def generate_summary_report(self):
         """Generate overall summary report"""
         print("Generating summary report...")
@@ -0,0 +1,75 @@
+"""Shared fixtures for the slips_defender auto responder unit tests.
+
+Run these tests with:
+    pytest tests/defender/ -v
+
+No Docker stack, planner or OpenCode server required — state files live in
+tmp_path and timeline output is discarded.
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+from typing import Generator
+
+import pytest
+
+# ── Make 'auto_responder' and 'app' importable ─────────────────────
+_DEFENDER = Path(__file__).resolve().parents[2] / "images" / "slips_defender" / "defender"
+if str(_DEFENDER) not in sys.path:
+    sys.path.insert(0, str(_DEFENDER))
+
+
+# ── Override parent conftest autouse fixtures ──────────────────────
+# Same as tests/dashboard: these tests stay fast and offline.
+
+@pytest.fixture(scope="session")
+def lab_env():
+    """No-op override — defender unit tests don't need the lab env."""
+    return {}
+
+
+@pytest.fixture(scope="session", autouse=True)
+def stack_ready(lab_env):  # type: ignore[override]
+    """No-op override — defender unit tests don't start Docker containers."""
+    yield
+
+
+# ── AutoResponder wired to tmp_path ────────────────────────────────
+
+@pytest.fixture
+def state_paths(tmp_path, monkeypatch):
+    """Point the alert file and processed-alert state into tmp_path."""
+    import auto_responder
+
+    paths = {
+        "alerts": tmp_path / "slips" / "defender_alerts.ndjson",
+        "snapshot": tmp_path / "processed_alerts.json",
+        "journal": tmp_path / "processed_alerts.log",
+    }
+    paths["alerts"].parent.mkdir()
+    monkeypatch.setattr(auto_responder, "ALERT_FILE", paths["alerts"])
+    monkeypatch.setattr(auto_responder, "PROCESSED_FILE", paths["snapshot"])
+    monkeypatch.setattr(auto_responder, "PROCESSED_JOURNAL", paths["journal"])
+    monkeypatch.setattr(auto_responder.AutoResponder, "setup_logging", lambda self: None)
+    monkeypatch.setattr(auto_responder.AutoResponder, "write_timeline_entry", lambda self, *a, **kw: None)
+    return paths
+
+
+@pytest.fixture
+def make_responder(state_paths) -> Generator:
+    """Factory for AutoResponders that share state_paths (a 'restart' is a second call)."""
+    import auto_responder
+
+    created = []
+
+    def _make():
+        responder = auto_responder.AutoResponder()
+        created.append(responder)
+        return responder
+
+    yield _make
+    for responder in created:
+        responder._stop_timeline_writer()
+        responder._exec_pool.shutdown(wait=False)
@@ -0,0 +1,355 @@
+"""Unit tests for the auto responder's alert intake and dedup state."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import auto_responder
+from auto_responder import _HashBloom
+
+
+def _digest(i: int) -> str:
+    return hashlib.blake2b(str(i).encode(), digest_size=16).hexdigest()
+
+
+# ═══════════════════════════════════════════════════════════════════
+# _HashBloom
+# ═══════════════════════════════════════════════════════════════════
+
+class TestHashBloom:
+    """Tests for auto_responder._HashBloom."""
+
+    def test_added_digests_are_members(self):
+        bloom = _HashBloom()
+        digests = [_digest(i) for i in range(1000)]
+        for digest in digests:
+            bloom.add(digest)
+        assert all(digest in bloom for digest in digests)
+
+    def test_empty_filter_has_no_members(self):
+        bloom = _HashBloom()
+        assert not any(_digest(i) in bloom for i in range(1000))
+
+    def test_false_positive_rate_is_low_within_capacity(self):
+        bloom = _HashBloom.for_members(_digest(i) for i in range(5000))
+        false_hits = sum(_digest(i) in bloom for i in range(5000, 55000))
+        assert false_hits <= 5
+
+    def test_non_hex_entries_are_ignored_on_add(self):
+        bloom = _HashBloom()
+        bloom.add("not-a-digest")
+        bloom.add("abc")
+        assert _digest(1) not in bloom
+
+    def test_non_hex_lookups_defer_to_exact_set(self):
+        assert "not-a-digest" in _HashBloom()
+
+    def test_for_members_tolerates_non_hex_entries(self):
+        bloom = _HashBloom.for_members(["legacy-entry", _digest(7)])
+        assert _digest(7) in bloom
+
+    def test_for_members_grows_with_membership(self):
+        digests = [_digest(i) for i in range(20000)]
+        bloom = _HashBloom.for_members(digests)
+        assert bloom.capacity >= 2 * len(digests)
+        assert all(digest in bloom for digest in digests)
+
+    def test_default_capacity(self):
+        assert _HashBloom().capacity == (1 << 20) // 100
+
+
+class TestMarkProcessed:
+    """Tests for AutoResponder.is_processed / mark_processed."""
+
+    def test_marked_hash_is_processed(self, make_responder):
+        responder = make_responder()
+        assert not responder.is_processed(_digest(1))
+        responder.mark_processed(_digest(1))
+        assert responder.is_processed(_digest(1))
+
+    def test_filter_is_rebuilt_past_capacity(self, make_responder):
+        responder = make_responder()
+        responder._processed_bloom = _HashBloom(bits_log2=10)
+        capacity = responder._processed_bloom.capacity
+        digests = [_digest(i) for i in range(capacity + 5)]
+        for digest in digests:
+            responder.mark_processed(digest)
+        assert responder._processed_bloom.capacity > capacity
+        assert all(responder.is_processed(digest) for digest in digests)
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Processed-alert snapshot + journal
+# ═══════════════════════════════════════════════════════════════════
+
+def _record_processed(responder, alert_hash: str) -> None:
+    """What run_once does after a successful process_alert."""
+    responder.mark_processed(alert_hash)
+    responder._unsaved.append(f"a {alert_hash}")
+
+
+class TestProcessedState:
+    """Tests for load_processed_alerts / save_processed_alerts."""
+
+    @pytest.fixture(autouse=True)
+    def _compact_every(self, monkeypatch):
+        monkeypatch.setattr(auto_responder, "PROCESSED_COMPACT_EVERY", 5)
+
+    def test_small_saves_only_append_to_journal(self, make_responder, state_paths):
+        responder = make_responder()
+        _record_processed(responder, _digest(1))
+        responder.save_processed_alerts()
+        assert not state_paths["snapshot"].exists()
+        assert state_paths["journal"].read_text() == f"a {_digest(1)}\n"
+        assert responder._unsaved == []
+
+    def test_journal_is_replayed_on_restart(self, make_responder):
+        responder = make_responder()
+        for i in range(3):
+            _record_processed(responder, _digest(i))
+        responder.record_threat({"sourceip": "10.0.0.1", "destip": "172.31.0.10"})
+        responder.save_processed_alerts()
+
+        restarted = make_responder()
+        assert restarted.processed_alerts == {_digest(i) for i in range(3)}
+        assert all(restarted.is_processed(_digest(i)) for i in range(3))
+        assert list(restarted.threat_history) == list(responder.threat_history)
+        assert restarted._journal_entries == 4
+
+    def test_compaction_rewrites_snapshot_and_empties_journal(self, make_responder, state_paths):
+        responder = make_responder()
+        for i in range(6):
+            _record_processed(responder, _digest(i))
+            responder.save_processed_alerts()
+
+        assert state_paths["snapshot"].exists()
+        assert not state_paths["snapshot"].with_suffix(".json.tmp").exists()
+        # Compacted at the 5th entry; only the 6th is journaled since
+        assert state_paths["journal"].read_text() == f"a {_digest(5)}\n"
+        data = json.loads(state_paths["snapshot"].read_bytes())
+        assert data["processed_hashes"] == sorted(_digest(i) for i in range(5))
+        assert data["hash_format"] == "blake2b-fields"
+
+        restarted = make_responder()
+        assert restarted.processed_alerts == {_digest(i) for i in range(6)}
+
+    def test_journal_already_in_snapshot_replays_harmlessly(self, make_responder, state_paths):
+        responder = make_responder()
+        for i in range(5):
+            _record_processed(responder, _digest(i))
+        responder.save_processed_alerts()
+        # Simulate a crash between the snapshot rename and the journal unlink
+        state_paths["journal"].write_text("".join(f"a {_digest(i)}\n" for i in range(5)))
+
+        restarted = make_responder()
+        assert restarted.processed_alerts == {_digest(i) for i in range(5)}
+
+    def test_expired_threats_are_not_restored(self, make_responder, state_paths):
+        stale = (datetime.now(timezone.utc) - timedelta(hours=1)).isoformat()
+        fresh = datetime.now(timezone.utc).isoformat()
+        state_paths["journal"].write_text(f"t old {stale}\nt new {fresh}\nt bad not-a-time\n")
+        responder = make_responder()
+        assert list(responder.threat_history) == ["new"]
+
+    def test_threat_history_is_loaded_oldest_first(self, make_responder, state_paths):
+        now = datetime.now(timezone.utc)
+        older = (now - timedelta(seconds=60)).isoformat()
+        state_paths["journal"].write_text(f"t b {now.isoformat()}\nt a {older}\n")
+        responder = make_responder()
+        assert list(responder.threat_history) == ["a", "b"]
+
+    def test_corrupt_snapshot_starts_empty(self, make_responder, state_paths):
+        state_paths["snapshot"].write_text("{not json")
+        responder = make_responder()
+        assert responder.processed_alerts == set()
+        assert len(responder.threat_history) == 0
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Alert file tail reader
+# ═══════════════════════════════════════════════════════════════════
+
+def _alert(i: int, **extra) -> dict:
+    alert = {
+        "sourceip": "10.0.0.5",
+        "destip": "172.31.0.10",
+        "attackid": f"attack-{i}",
+        "proto": "tcp",
+        "timestamp": f"2026-01-01T00:00:{i:02d}",
+        "raw": "Threat level: high. Horizontal port scan",
+    }
+    alert.update(extra)
+    return alert
+
+
+def _lines(*alerts) -> str:
+    return "".join(json.dumps(alert) + "\n" for alert in alerts)
+
+
+def _ids(alerts) -> list:
+    return [alert["attackid"] for alert in alerts]
+
+
+class TestAlertTail:
+    """Tests for AutoResponder.get_new_alerts over a growing alert file."""
+
+    def test_missing_file_yields_nothing(self, make_responder):
+        assert make_responder().get_new_alerts() == []
+
+    def test_appended_alerts_are_read_once(self, make_responder, state_paths):
+        responder = make_responder()
+        alerts_file = state_paths["alerts"]
+        alerts_file.write_text(_lines(_alert(0), _alert(1)))
+        assert _ids(responder.get_new_alerts()) == ["attack-0", "attack-1"]
+
+        with alerts_file.open("a") as f:
+            f.write(_lines(_alert(2)))
+        offset = responder._alert_offset
+        assert _ids(responder.get_new_alerts()) == ["attack-0", "attack-1", "attack-2"]
+        assert responder._alert_offset == alerts_file.stat().st_size > offset
+
+    def test_processed_alerts_leave_the_pending_set(self, make_responder, state_paths):
+        responder = make_responder()
+        state_paths["alerts"].write_text(_lines(_alert(0), _alert(1)))
+        first = responder.get_new_alerts()
+        responder.mark_processed(responder.get_alert_hash(first[0]))
+        assert _ids(responder.get_new_alerts()) == ["attack-1"]
+
+    def test_low_confidence_and_status_lines_are_skipped(self, make_responder, state_paths):
+        responder = make_responder()
+        state_paths["alerts"].write_text(
+            _lines(
+                {"note": "heartbeat"},
+                _alert(0, raw="Threat level: low"),
+                _alert(1),
+            )
+            + "not json\n"
+        )
+        assert _ids(responder.get_new_alerts()) == ["attack-1"]
+
+    def test_partial_last_line_waits_for_its_newline(self, make_responder, state_paths):
+        responder = make_responder()
+        alerts_file = state_paths["alerts"]
+        complete = _lines(_alert(0))
+        partial = json.dumps(_alert(1))[:40]
+        alerts_file.write_text(complete + partial)
+        assert _ids(responder.get_new_alerts()) == ["attack-0"]
+        assert responder._alert_offset == len(complete)
+
+        alerts_file.write_text(complete + _lines(_alert(1)))
+        assert _ids(responder.get_new_alerts()) == ["attack-0", "attack-1"]
+
+    def test_parseable_last_line_without_newline_is_taken(self, make_responder, state_paths):
+        responder = make_responder()
+        state_paths["alerts"].write_text(json.dumps(_alert(0)))
+        assert _ids(responder.get_new_alerts()) == ["attack-0"]
+        assert responder._alert_offset == state_paths["alerts"].stat().st_size
+
+    def test_truncated_file_is_read_from_start(self, make_responder, state_paths):
+        responder = make_responder()
+        alerts_file = state_paths["alerts"]
+        alerts_file.write_text(_lines(*(_alert(i) for i in range(5))))
+        for alert in responder.get_new_alerts():
+            responder.mark_processed(responder.get_alert_hash(alert))
+
+        inode = alerts_file.stat().st_ino
+        alerts_file.write_text(_lines(_alert(9)))
+        assert alerts_file.stat().st_ino == inode
+        assert _ids(responder.get_new_alerts()) == ["attack-9"]
+
+    def test_replaced_file_resets_offset(self, make_responder, state_paths, tmp_path):
+        responder = make_responder()
+        alerts_file = state_paths["alerts"]
+        alerts_file.write_text(_lines(_alert(0)))
+        for alert in responder.get_new_alerts():
+            responder.mark_processed(responder.get_alert_hash(alert))
+
+        # A new, larger file renamed into place: the old offset would skip
+        # its first alerts if it were kept
+        replacement = tmp_path / "replacement.ndjson"
+        replacement.write_text(_lines(*(_alert(i) for i in range(10, 14))))
+        os.replace(replacement, alerts_file)
+        assert _ids(responder.get_new_alerts()) == [f"attack-{i}" for i in range(10, 14)]
+
+    def test_unchanged_file_is_not_reopened(self, make_responder, state_paths, monkeypatch):
+        responder = make_responder()
+        state_paths["alerts"].write_text(_lines(_alert(0)))
+        responder.get_new_alerts()
+
+        def fail():
+            raise AssertionError("alert file re-read although unchanged")
+
+        monkeypatch.setattr(responder, "_read_appended_alerts", fail)
+        assert _ids(responder.get_new_alerts()) == ["attack-0"]
+
+
+    def test_failed_read_is_retried_without_a_new_write(self, make_responder, state_paths, monkeypatch):
+        responder = make_responder()
+        state_paths["alerts"].write_text(_lines(_alert(0)))
+        real_open = type(state_paths["alerts"]).open
+
+        def flaky_open(path, *args, **kwargs):
+            raise OSError("transient read failure")
+
+        monkeypatch.setattr(type(state_paths["alerts"]), "open", flaky_open)
+        assert responder.get_new_alerts() == []
+        monkeypatch.setattr(type(state_paths["alerts"]), "open", real_open)
+        assert _ids(responder.get_new_alerts()) == ["attack-0"]
+
+
+class TestLegacyAlertHashes:
+    """Snapshots written before the blake2b alert hash hold md5 keys."""
+
+    @staticmethod
+    def _md5_hash(alert: dict) -> str:
+        key_fields = {field: alert.get(field, "") for field in ("sourceip", "destip", "attackid", "proto", "timestamp")}
+        return hashlib.md5(json.dumps(key_fields, sort_keys=True).encode()).hexdigest()
+
+    def test_alert_processed_under_md5_is_not_rerun(self, make_responder, state_paths):
+        state_paths["snapshot"].write_text(json.dumps({
+            "processed_hashes": [self._md5_hash(_alert(0))],
+            "threat_history": {},
+        }))
+        state_paths["alerts"].write_text(_lines(_alert(0), _alert(1)))
+
+        responder = make_responder()
+        assert _ids(responder.get_new_alerts()) == ["attack-1"]
+        # Re-keyed under the new hash, and journaled on the next save
+        new_hash = responder.get_alert_hash(_alert(0))
+        assert responder.is_processed(new_hash)
+        assert responder._unsaved == [f"a {new_hash}"]
+        assert responder._legacy_processed == set()
+
+    def test_migration_ends_after_the_first_full_read(self, make_responder, state_paths, monkeypatch):
+        state_paths["snapshot"].write_text(json.dumps({
+            "processed_hashes": [self._md5_hash(_alert(0)), self._md5_hash(_alert(7))],
+        }))
+        state_paths["alerts"].write_text(_lines(_alert(0)))
+
+        responder = make_responder()
+        assert responder.get_new_alerts() == []
+        # _alert(7) never showed up, yet its legacy key is not kept around
+        assert responder._legacy_processed == set()
+
+        def fail(alert, alert_hash):
+            raise AssertionError("legacy hash computed after the migration ended")
+
+        monkeypatch.setattr(responder, "_migrate_legacy_hash", fail)
+        with state_paths["alerts"].open("a") as f:
+            f.write(_lines(_alert(1)))
+        assert _ids(responder.get_new_alerts()) == ["attack-1"]
+
+    def test_snapshot_does_not_carry_legacy_hashes(self, make_responder, state_paths):
+        state_paths["snapshot"].write_text(json.dumps({"processed_hashes": [self._md5_hash(_alert(7))]}))
+
+        responder = make_responder()
+        responder._write_processed_snapshot()
+        data = json.loads(state_paths["snapshot"].read_bytes())
+        assert data["hash_format"] == "blake2b-fields"
+        assert "legacy_hashes" not in data
+        assert make_responder()._legacy_processed == set()
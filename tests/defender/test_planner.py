@@ -0,0 +1,53 @@
+"""Unit tests for the planner's reply parsing (app/planner.py)."""
+
+from __future__ import annotations
+
+import pytest
+
+pytest.importorskip("langchain_openai")
+
+from app.planner import _extract_json_object  # noqa: E402
+
+
+class TestExtractJsonObject:
+    """Tests for app.planner._extract_json_object."""
+
+    def test_plain_object(self):
+        assert _extract_json_object('{"executor_host_ip": "172.31.0.10", "plan": "x"}') == {
+            "executor_host_ip": "172.31.0.10",
+            "plan": "x",
+        }
+
+    def test_prose_around_the_object_is_ignored(self):
+        text = 'Here is the plan:\n{"plan": "block 10.0.0.5"}\nLet me know if you need more.'
+        assert _extract_json_object(text) == {"plan": "block 10.0.0.5"}
+
+    def test_code_fence(self):
+        text = '```json\n{"plan": "isolate host"}\n```'
+        assert _extract_json_object(text) == {"plan": "isolate host"}
+
+    def test_think_preamble_with_braces_is_dropped(self):
+        text = '<think>maybe {"plan": "wrong"}?</think>{"plan": "right"}'
+        assert _extract_json_object(text) == {"plan": "right"}
+
+    def test_braces_inside_strings(self):
+        text = 'ok {"plan": "match {curly} and } braces", "n": 1} trailing }'
+        assert _extract_json_object(text) == {"plan": "match {curly} and } braces", "n": 1}
+
+    def test_first_object_wins_when_several(self):
+        assert _extract_json_object('{"a": 1} {"b": 2}') == {"a": 1}
+
+    def test_no_object_raises(self):
+        with pytest.raises(ValueError):
+            _extract_json_object("no json here")
+
+    def test_object_inside_array_is_found(self):
+        assert _extract_json_object('[{"plan": "x"}]') == {"plan": "x"}
+
+    def test_scalar_reply_raises(self):
+        with pytest.raises(ValueError):
+            _extract_json_object("42")
+
+    def test_truncated_object_raises(self):
+        with pytest.raises(ValueError):
+            _extract_json_object('{"plan": "cut off')
@@ -0,0 +1,36 @@
+"""Shared fixtures for the OpenCode runner helper unit tests.
+
+Run these tests with:
+    pytest tests/runners/ -v
+
+Covers images/shared (timeline helpers) and the scripts/ runners; no Docker
+stack or OpenCode server required.
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# ── Make 'shared' and the runner scripts importable ────────────────
+_ROOT = Path(__file__).resolve().parents[2]
+for _path in (_ROOT / "images", _ROOT / "scripts"):
+    if str(_path) not in sys.path:
+        sys.path.insert(0, str(_path))
+
+
+# ── Override parent conftest autouse fixtures ──────────────────────
+# Same as tests/dashboard: these tests stay fast and offline.
+
+@pytest.fixture(scope="session")
+def lab_env():
+    """No-op override — runner unit tests don't need the lab env."""
+    return {}
+
+
+@pytest.fixture(scope="session", autouse=True)
+def stack_ready(lab_env):  # type: ignore[override]
+    """No-op override — runner unit tests don't start Docker containers."""
+    yield
@@ -0,0 +1,80 @@
+"""Unit tests for the buffered writers in scripts/attacker_opencode_interactive.py."""
+
+from __future__ import annotations
+
+import os
+
+import pytest
+
+import attacker_opencode_interactive as runner
+from attacker_opencode_interactive import BackgroundWriter, _writev_all
+
+
+@pytest.fixture
+def short_writev(monkeypatch):
+    """Make os.writev write at most *limit* bytes per call, like a full pipe."""
+    calls = []
+    real_writev = os.writev
+
+    def install(limit: int):
+        def writev(fd, buffers):
+            joined = b"".join(buffers)[:limit]
+            calls.append(len(joined))
+            return real_writev(fd, [joined])
+
+        monkeypatch.setattr(runner.os, "writev", writev)
+        return calls
+
+    return install
+
+
+class TestWritevAll:
+    """Tests for attacker_opencode_interactive._writev_all."""
+
+    def test_writes_all_buffers_in_order(self, tmp_path):
+        path = tmp_path / "out.bin"
+        with open(path, "wb", buffering=0) as f:
+            _writev_all(f.fileno(), [b"alpha\n", b"", b"beta\n", b"gamma\n"])
+        assert path.read_bytes() == b"alpha\nbeta\ngamma\n"
+
+    def test_resumes_after_short_writes(self, tmp_path, short_writev):
+        calls = short_writev(4)
+        buffers = [b"0123456789", b"ab", b"cdefgh"]
+        path = tmp_path / "out.bin"
+        with open(path, "wb", buffering=0) as f:
+            _writev_all(f.fileno(), list(buffers))
+        assert path.read_bytes() == b"".join(buffers)
+        assert sum(calls) == 18 and len(calls) == 5
+
+    def test_short_write_on_a_buffer_boundary(self, tmp_path, short_writev):
+        short_writev(3)
+        path = tmp_path / "out.bin"
+        with open(path, "wb", buffering=0) as f:
+            _writev_all(f.fileno(), [b"abc", b"def", b"g"])
+        assert path.read_bytes() == b"abcdefg"
+
+    def test_empty_list_writes_nothing(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(runner.os, "writev", lambda fd, buffers: pytest.fail("writev called"))
+        _writev_all(0, [])
+
+
+class TestBackgroundWriter:
+    """Tests for attacker_opencode_interactive.BackgroundWriter."""
+
+    def test_close_flushes_everything_in_order(self, tmp_path):
+        path = tmp_path / "out.jsonl"
+        with BackgroundWriter(open(path, "ab", buffering=0)) as writer:
+            for i in range(2000):
+                writer.write(b"%d\n" % i)
+        assert path.read_bytes().splitlines() == [b"%d" % i for i in range(2000)]
+
+    def test_write_errors_are_reported_not_raised(self, tmp_path, monkeypatch, capsys):
+        def failing_writev(fd, buffers):
+            raise OSError(28, "No space left on device")
+
+        monkeypatch.setattr(runner.os, "writev", failing_writev)
+        writer = BackgroundWriter(open(tmp_path / "out.jsonl", "ab", buffering=0))
+        for _ in range(10):
+            writer.write(b"x\n")
+        writer.close()
+        assert "No space left on device" in capsys.readouterr().err
@@ -0,0 +1,52 @@
+"""Unit tests for shared.timeline."""
+
+from __future__ import annotations
+
+import json
+import time
+from datetime import datetime, timezone
+
+from shared import timeline
+from shared.timeline import append_timeline_entry, utc_timestamp
+
+
+class TestUtcTimestamp:
+    """Tests for shared.timeline.utc_timestamp."""
+
+    def test_matches_datetime_isoformat_layout(self):
+        ts = utc_timestamp()
+        parsed = datetime.fromisoformat(ts)
+        assert parsed.tzinfo == timezone.utc
+        assert ts.endswith("+00:00")
+        # Always microseconds, like datetime.now(timezone.utc).isoformat()
+        assert len(ts) == len("2026-01-27T16:10:16.123456+00:00")
+
+    def test_is_current_time(self):
+        before = datetime.now(timezone.utc)
+        parsed = datetime.fromisoformat(utc_timestamp())
+        after = datetime.now(timezone.utc)
+        assert before <= parsed <= after
+
+    def test_cached_prefix_follows_the_clock(self, monkeypatch):
+        clock = [1_700_000_000_250_000_000]
+        monkeypatch.setattr(time, "time_ns", lambda: clock[0])
+        assert utc_timestamp() == "2023-11-14T22:13:20.250000+00:00"
+        clock[0] += 1_500_000_000
+        assert utc_timestamp() == "2023-11-14T22:13:21.750000+00:00"
+        assert timeline._ts_second == 1_700_000_001
+
+
+class TestAppendTimelineEntry:
+    """Tests for shared.timeline.append_timeline_entry."""
+
+    def test_appends_one_compact_line_per_entry(self, tmp_path):
+        path = tmp_path / "nested" / "timeline.jsonl"
+        append_timeline_entry(str(path), "init", "started")
+        append_timeline_entry(str(path), "EXEC", "done", data={"exit_code": 0})
+
+        lines = path.read_text().splitlines()
+        assert len(lines) == 2
+        first, second = (json.loads(line) for line in lines)
+        assert first["level"] == "INIT" and "data" not in first
+        assert second["data"] == {"exit_code": 0}
+        assert ": " not in lines[1]